@@ -0,0 +1,133 @@
+import fcntl
+import os
+import time
+from typing import BinaryIO, List, Optional
+
+from indico.core.config import config
+from werkzeug.exceptions import ServiceUnavailable
+
+from .metrics import report_admission, track_queue_depth
+
+
+# Интервал повторных попыток занять слот в очереди, с
+POLL_INTERVAL = 0.1
+
+# Через сколько секунд клиенту предлагается повторить запрос, если очередь переполнена, с
+RETRY_AFTER = 30
+
+
+class ExportQueueFull(ServiceUnavailable):
+    """Ответ 503 с Retry-After: очередь выгрузок переполнена или ожидание в ней истекло"""
+    
+    description = 'Слишком много одновременных выгрузок, повторите позже'
+    
+    def __init__(self):
+        super().__init__(retry_after=RETRY_AFTER)
+
+
+def _get_slots_dir() -> str:
+    directory = os.path.join(config.CACHE_DIR, 'exportdocs', 'slots')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _try_lock(path: str) -> Optional[BinaryIO]:
+    """Файл слота с блокировкой или None, если слот занят"""
+    lock = open(path, 'ab')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+
+def _unlock(lock: BinaryIO) -> None:
+    fcntl.flock(lock, fcntl.LOCK_UN)
+    lock.close()
+
+
+def _try_lock_any(paths: List[str]) -> Optional[BinaryIO]:
+    for path in paths:
+        lock = _try_lock(path)
+        if lock is not None:
+            return lock
+    return None
+
+
+def _try_lock_groups(groups: List[List[str]]) -> Optional[List[BinaryIO]]:
+    """По одному слоту из каждой группы или None, если хотя бы в одной группе все слоты заняты"""
+    locks = []
+    for paths in groups:
+        lock = _try_lock_any(paths)
+        if lock is None:
+            for acquired in locks:
+                _unlock(acquired)
+            return None
+        locks.append(lock)
+    return locks
+
+
+class ExportSlot:
+    """Занятые слоты выполнения экспорта; освобождаются при выходе из блока или вызовом release"""
+    
+    def __init__(self, locks: List[BinaryIO]):
+        self._locks = locks
+    
+    def release(self) -> None:
+        for lock in self._locks:
+            _unlock(lock)
+        self._locks = []
+    
+    def __enter__(self) -> 'ExportSlot':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+
+def acquire_export_slot(event_id: Optional[int] = None) -> ExportSlot:
+    """Слот для построения документа в пределах общего лимита и лимита события
+    
+    Слоты — файлы с блокировками fcntl, поэтому лимиты общие для всех процессов
+    и освобождаются даже при падении процесса. Если свободных слотов нет, запрос
+    ждет в очереди не дольше таймаута из настроек; при переполнении очереди
+    или по истечении таймаута отвечает 503 с заголовком Retry-After.
+    """
+    from .plugin import ExportDocsPlugin
+    settings = ExportDocsPlugin.settings.get_all()
+    global_limit, event_limit = settings['max_exports'], settings['max_event_exports']
+    directory = _get_slots_dir()
+    groups = []
+    if global_limit:
+        groups.append([os.path.join(directory, f'global-{i}.lock') for i in range(global_limit)])
+    if event_id is not None and event_limit:
+        groups.append([os.path.join(directory, f'event-{event_id}-{i}.lock') for i in range(event_limit)])
+    if not groups:
+        return ExportSlot([])
+
+    locks = _try_lock_groups(groups)
+    if locks is not None:
+        report_admission('admitted')
+        return ExportSlot(locks)
+
+    # Мест в очереди столько же, сколько слотов: лишние запросы получают отказ сразу
+    queue_size = max(global_limit, event_limit)
+    queue_lock = _try_lock_any([os.path.join(directory, f'queue-{i}.lock') for i in range(queue_size)])
+    if queue_lock is None:
+        report_admission('rejected')
+        raise ExportQueueFull()
+    start = time.monotonic()
+    deadline = start + settings['export_queue_timeout']
+    try:
+        with track_queue_depth():
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                locks = _try_lock_groups(groups)
+                if locks is not None:
+                    report_admission('queued', time.monotonic() - start)
+                    return ExportSlot(locks)
+    finally:
+        _unlock(queue_lock)
+    report_admission('rejected', time.monotonic() - start)
+    raise ExportQueueFull()
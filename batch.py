@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import BinaryIO, Callable, Iterable, Optional
+from zipfile import ZIP_STORED, ZipFile
+
+from .filters import ExportFilter
+from .metrics import ExportTimer, logger
+
+
+def _get_python_executable() -> str:
+    """Интерпретатор для процессов пула
+    
+    Под uWSGI sys.executable указывает на бинарник uwsgi, и spawn запустил бы
+    его вместо Python; тогда берется интерпретатор окружения, в котором работает Indico.
+    """
+    if os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+    for name in (f'python{sys.version_info.major}.{sys.version_info.minor}', f'python{sys.version_info.major}',
+                 'python'):
+        path = os.path.join(sys.exec_prefix, 'bin', name)
+        if os.access(path, os.X_OK):
+            return path
+    return shutil.which(f'python{sys.version_info.major}') or sys.executable
+
+
+def get_spawn_context() -> multiprocessing.context.SpawnContext:
+    """Контекст spawn, запускающий процессы пула интерпретатором Python, а не процессом веб-сервера"""
+    context = multiprocessing.get_context('spawn')
+    context.set_executable(_get_python_executable())
+    return context
+
+
+def terminate_pool(pool: ProcessPoolExecutor) -> None:
+    """Остановка пула с завершением его процессов, в том числе зависших на документе"""
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def _init_worker() -> None:
+    """Инициализация процесса: собственное приложение Indico и соединение с базой"""
+    from indico.web.flask.app import make_app
+    app = make_app()
+    app.app_context().push()
+
+
+def _export_worker(event_id: int, kind: str) -> bytes:
+    """Генерация одного документа в процессе пула"""
+    from indico.core.db import db
+    from .util import generate_docx
+    try:
+        return generate_docx(kind, event_id)
+    finally:
+        db.session.rollback()
+
+
+def get_batch_settings() -> tuple:
+    """Число процессов и таймаут одного документа из настроек плагина"""
+    from .plugin import ExportDocsPlugin
+    workers = ExportDocsPlugin.settings.get('batch_workers') or os.cpu_count()
+    timeout = ExportDocsPlugin.settings.get('batch_timeout') or None
+    return workers, timeout
+
+
+def export_events_archive(event_ids: Iterable[int], kinds: Iterable[str], fileobj: BinaryIO,
+                          workers: Optional[int] = None, timeout: Optional[int] = None) -> None:
+    """Параллельная генерация документов нескольких событий в один ZIP-архив
+    
+    Сборка python-docx упирается в GIL, поэтому документы строятся в отдельных
+    процессах, каждый со своим приложением Indico и сессией базы данных.
+    Документы, которые не удалось построить, перечисляются в errors.txt.
+    """
+    jobs = [(event_id, kind) for event_id in event_ids for kind in kinds]
+    errors = []
+    timed_out = False
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_spawn_context(), initializer=_init_worker)
+    try:
+        futures = [(pool.submit(_export_worker, event_id, kind), event_id, kind) for event_id, kind in jobs]
+        # DOCX уже сжат, повторно сжимать архив нет смысла
+        with ZipFile(fileobj, 'w', compression=ZIP_STORED) as zf:
+            for future, event_id, kind in futures:
+                try:
+                    data = future.result(timeout=timeout)
+                except TimeoutError:
+                    timed_out = True
+                    errors.append(f'{event_id}/{kind}: превышено время генерации ({timeout} с)')
+                except Exception as exc:
+                    errors.append(f'{event_id}/{kind}: {exc!r}')
+                else:
+                    zf.writestr(f'{event_id}/{kind}.docx', data)
+            if errors:
+                zf.writestr('errors.txt', '\n'.join(errors) + '\n')
+    finally:
+        if timed_out:
+            # Зависший процесс не должен продолжать работу после ответа
+            terminate_pool(pool)
+        else:
+            pool.shutdown(wait=not errors, cancel_futures=True)
+
+
+def _build_document(kind: str, export_format: str, snapshot, settings: dict, section_cache,
+                    timeout: Optional[float] = None) -> bytes:
+    """Построение документа по готовому снимку события; база данных и приложение Indico не нужны
+    
+    С timeout построение прерывается TimeoutError на очередном разделе, если время вышло.
+    """
+    from .formats import EXPORT_FORMATS
+    from .util import GENERATOR_CLASSES
+    progress = None
+    if timeout:
+        deadline = time.monotonic() + timeout
+        
+        def progress(done: int, total: int) -> None:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'{kind}: превышено время генерации ({timeout} с)')
+    
+    generator = GENERATOR_CLASSES[kind](snapshot.event_id, snapshot=snapshot, settings=settings,
+                                        section_cache=section_cache, progress=progress)
+    output = BytesIO()
+    EXPORT_FORMATS[export_format].write(generator, output)
+    return output.getvalue()
+
+
+def _document_worker(kind: str, payload: bytes) -> bytes:
+    """Построение документа в процессе пула; снимок и настройки сериализованы один раз на все документы"""
+    return _build_document(kind, *pickle.loads(payload))
+
+
+# Документы, которые входят в общий архив события
+DOCUMENT_KINDS = ('list', 'report', 'papers')
+
+
+# Пул процессов для документов одного события; False — пул не используется (одно ядро)
+_document_pool = None
+_document_pool_lock = threading.Lock()
+
+
+def get_document_pool() -> Optional[ProcessPoolExecutor]:
+    """Пул процессов для документов одного события, общий для запросов веб-процесса
+    
+    На одном ядре процессы ничего не ускоряют, и документы строятся в текущем процессе.
+    """
+    global _document_pool
+    with _document_pool_lock:
+        if _document_pool is None:
+            workers = min(len(DOCUMENT_KINDS), os.cpu_count() or 1)
+            _document_pool = (ProcessPoolExecutor(max_workers=workers, mp_context=get_spawn_context())
+                              if workers >= 2 else False)
+        return _document_pool or None
+
+
+def _reset_document_pool(pool: ProcessPoolExecutor) -> None:
+    """Остановка пула после сбоя; следующий экспорт создаст новый пул"""
+    global _document_pool
+    with _document_pool_lock:
+        if _document_pool is pool:
+            _document_pool = None
+    terminate_pool(pool)
+
+
+def export_event_documents(event_id: int, fileobj: BinaryIO, export_format: str = 'docx',
+                           kinds: Iterable[str] = DOCUMENT_KINDS,
+                           progress: Optional[Callable[[int, int], None]] = None,
+                           timer: Optional[ExportTimer] = None,
+                           export_filter: Optional[ExportFilter] = None) -> None:
+    """Все документы события в одном ZIP-архиве по одной загрузке данных
+    
+    Снимок события загружается один раз и передается в процессы пула, где
+    документы строятся одновременно: время выгрузки близко ко времени самого
+    долгого документа, а не к сумме.
+    """
+    from .cache import get_section_cache
+    from .formats import EXPORT_FORMATS
+    from .util import get_export_settings, load_event_snapshot
+    timer = timer or ExportTimer()
+    kinds = list(kinds)
+    settings = get_export_settings()
+    with timer.phase('load'):
+        snapshot = load_event_snapshot(event_id, export_filter)
+    timer.contributions = snapshot.contribution_count
+    section_cache = get_section_cache(settings['cache_max_size']) if settings['cache_max_size'] else None
+    fmt = EXPORT_FORMATS[export_format]
+    
+    def _report(done: int) -> None:
+        if progress:
+            progress(done, len(kinds))
+    
+    _, timeout = get_batch_settings()
+    with timer.phase('build'):
+        documents = None
+        pool = get_document_pool()
+        if pool is not None:
+            payload = pickle.dumps((export_format, snapshot, settings, section_cache), pickle.HIGHEST_PROTOCOL)
+            try:
+                futures = [pool.submit(_document_worker, kind, payload) for kind in kinds]
+                documents = []
+                for done, future in enumerate(futures, 1):
+                    documents.append(future.result(timeout=timeout))
+                    _report(done)
+            except (BrokenProcessPool, TimeoutError):
+                logger.exception('Сбой пула процессов документов, выгрузка достраивается в веб-процессе')
+                _reset_document_pool(pool)
+                documents = None
+        if documents is None:
+            documents = []
+            for done, kind in enumerate(kinds, 1):
+                documents.append(_build_document(kind, export_format, snapshot, settings, section_cache, timeout))
+                _report(done)
+    
+    with timer.phase('save'), ZipFile(fileobj, 'w', compression=fmt.archive_compression) as zf:
+        for kind, data in zip(kinds, documents):
+            zf.writestr(f'{kind}.{fmt.extension}', data)
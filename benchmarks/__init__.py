@@ -0,0 +1 @@
+"""Бенчмарки генераторов документов (запуск: python -m indico_exportdocs.benchmarks.<имя>)"""
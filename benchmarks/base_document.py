@@ -0,0 +1,37 @@
+"""Подготовка документа на экспорт: новый Document() с оформлением против копии базового документа"""
+
+import time
+
+from ..util import ConferenceReportGenerator, DocxGenerator, EventSnapshot
+from .fakes import DOCX_SETTINGS, make_contributions
+
+
+class FreshDocumentReportGenerator(ConferenceReportGenerator):
+    """Отчет с прежней подготовкой: распаковка шаблона python-docx и настройка стилей на каждый экспорт"""
+
+    @classmethod
+    def get_base_document(cls):
+        return cls.create_document()
+
+
+def _measure(action, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(count: int = 50, repeat: int = 20) -> None:
+    print(f'create_document: {_measure(DocxGenerator.create_document, repeat) * 1000:.2f} мс')
+    DocxGenerator.get_base_document()
+    print(f'get_base_document: {_measure(DocxGenerator.get_base_document, repeat) * 1000:.2f} мс')
+    snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(count))
+    for generator_cls in (FreshDocumentReportGenerator, ConferenceReportGenerator):
+        elapsed = _measure(lambda: generator_cls(0, snapshot=snapshot, settings=DOCX_SETTINGS).generate(), repeat)
+        print(f'{generator_cls.__name__}: {elapsed * 1000:.2f} мс на экспорт ({count} докладов)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,55 @@
+"""Классификатор affiliation против прежнего линейного поиска ключевых слов"""
+
+import random
+import time
+from typing import List
+
+from ..classifier import MASTER_KEYWORDS, STUDENT_KEYWORDS, AffiliationClassifier
+
+
+UNIVERSITIES = ['МГУ им. М.В. Ломоносова', 'СПбГУ', 'НИУ ВШЭ', 'МФТИ', 'ИТМО', 'КФУ', 'УрФУ', 'ТГУ', 'НГУ',
+                'МГТУ им. Н.Э. Баумана', 'Lomonosov Moscow State University', 'Kazan Federal University']
+SUFFIXES = ['1 курс', '2 курс', '3 курс', '4 курс', '5 курс', '6 курс', 'студент', 'магистрант',
+            'аспирант', 'bachelor student', 'master student', 'кафедра информатики', 'доцент', '']
+
+
+def make_corpus(size: int = 10000, seed: int = 0) -> List[str]:
+    """Корпус affiliation с повторами, как в реальных событиях"""
+    rnd = random.Random(seed)
+    distinct = [f'{university}, {suffix}' if suffix else university
+                for university in UNIVERSITIES for suffix in SUFFIXES]
+    # Частота убывает с номером, как у популярных вузов
+    weights = [1 / (i + 1) for i in range(len(distinct))]
+    return rnd.choices(distinct, weights=weights, k=size)
+
+
+def legacy_classify(affiliation: str) -> str:
+    """Прежний алгоритм: lower() и линейный поиск по двум спискам"""
+    if not affiliation:
+        return 'Не указан'
+    affiliation_lower = affiliation.lower()
+    for keyword in STUDENT_KEYWORDS:
+        if keyword in affiliation_lower:
+            return 'Студент'
+    for keyword in MASTER_KEYWORDS:
+        if keyword in affiliation_lower:
+            return 'Магистр'
+    return affiliation
+
+
+def run(size: int = 10000, repeat: int = 5) -> None:
+    corpus = make_corpus(size)
+    classifier = AffiliationClassifier(STUDENT_KEYWORDS, MASTER_KEYWORDS)
+    assert [classifier.classify(a) for a in corpus] == [legacy_classify(a) for a in corpus]
+    for name, func in (('legacy', legacy_classify), ('classifier', classifier.classify)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for affiliation in corpus:
+                func(affiliation)
+            timings.append(time.perf_counter() - start)
+        print(f'{name:>10}: {min(timings) * 1000:.2f} мс на {size} affiliation ({len(set(corpus))} различных)')
+
+
+if __name__ == '__main__':
+    run()
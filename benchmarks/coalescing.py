@@ -0,0 +1,57 @@
+"""Одновременные запросы одного документа: генерация должна выполняться один раз"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from ..cache import ExportCache
+from ..util import GENERATOR_CLASSES, EventSnapshot
+from .fakes import SETTINGS, make_contributions
+
+
+def _request(directory: str, count: int, barrier, results) -> None:
+    """Один «запрос»: документ из общего кэша или его генерация с отметкой в журнале"""
+    cache = ExportCache(os.path.join(directory, 'cache'), 1024 * 1024 * 1024)
+    snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(count, 3))
+    generator = GENERATOR_CLASSES['report'](0, snapshot=snapshot, settings=SETTINGS)
+
+    def _write(fileobj) -> None:
+        with open(os.path.join(directory, 'generations.log'), 'a') as log:
+            log.write(f'{os.getpid()}\n')
+        generator.generate_to_file(fileobj)
+
+    barrier.wait()
+    start = time.perf_counter()
+    _, created = cache.get_or_set('0-report-docx-benchmark', _write)
+    results.put((created, time.perf_counter() - start))
+
+
+def run(requests: int = 8, count: int = 2000) -> int:
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='exportdocs-coalescing-') as directory:
+        barrier = context.Barrier(requests)
+        results = context.Queue()
+        processes = [context.Process(target=_request, args=(directory, count, barrier, results))
+                     for _ in range(requests)]
+        for process in processes:
+            process.start()
+        timings = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        with open(os.path.join(directory, 'generations.log')) as log:
+            generations = len(log.readlines())
+    created = sum(1 for was_created, _ in timings if was_created)
+    print(f'запросов: {requests}, генераций: {generations}, создали документ: {created}')
+    print(f'ожидание ответа: макс. {max(elapsed for _, elapsed in timings):.3f} с ({count} докладов)')
+    return 0 if generations == 1 and created == 1 else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=8, help='число одновременных запросов')
+    parser.add_argument('--count', type=int, default=2000, help='число докладов в событии')
+    args = parser.parse_args()
+    sys.exit(run(args.requests, args.count))
@@ -0,0 +1,58 @@
+"""Запись пакета DOCX: сжатие всех частей через zipfile против заранее сжатых частей и уровня сжатия тела"""
+
+import time
+import zlib
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from ..engine import DOCUMENT_PART, DOCUMENT_TEMPLATE, DocxTemplateEngine
+from ..util import ContributionsListGenerator, EventSnapshot, get_template_engine
+from .fakes import SETTINGS, make_contributions
+
+
+# Размеры синтетических событий: число докладов и дней
+SIZES = ((100, 1), (1000, 3), (5000, 5), (20000, 10))
+
+LEVELS = (0, 1, 6, 9)
+
+
+def zipfile_render_to_file(engine: DocxTemplateEngine, context: dict, fileobj) -> None:
+    """Прежняя запись: каждая часть пакета заново сжимается zipfile"""
+    with ZipFile(fileobj, 'w', compression=ZIP_DEFLATED) as zf:
+        for part in engine.parts:
+            if part is not None:
+                zf.writestr(part.entry.name, zlib.decompress(part.data, -zlib.MAX_WBITS))
+                continue
+            body = (text.encode('utf-8') for text in engine.env.get_template(DOCUMENT_TEMPLATE).generate(context))
+            with zf.open(DOCUMENT_PART, 'w') as stream:
+                for chunk in engine._document_chunks(body):
+                    stream.write(chunk)
+
+
+def _measure(write, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        output = BytesIO()
+        start = time.perf_counter()
+        write(output)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(output.getvalue())
+
+
+def run(repeat: int = 3) -> None:
+    engine = get_template_engine()
+    for count, days in SIZES:
+        snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(count, days))
+        generator = ContributionsListGenerator(0, snapshot=snapshot, settings=SETTINGS)
+        # Разделы рендерятся заранее, чтобы замерять только запись пакета
+        context = generator._get_template_context(engine)
+        context['sections'] = list(context['sections'])
+        elapsed, size = _measure(lambda f: zipfile_render_to_file(engine, context, f), repeat)
+        print(f'{count:>6} докладов, zipfile:    {elapsed * 1000:8.1f} мс, {size / 1024:8.1f} КБ')
+        for level in LEVELS:
+            elapsed, size = _measure(lambda f: engine.render_to_file(DOCUMENT_TEMPLATE, context, f, level), repeat)
+            print(f'{count:>6} докладов, уровень {level}: {elapsed * 1000:8.1f} мс, {size / 1024:8.1f} КБ')
+
+
+if __name__ == '__main__':
+    run()
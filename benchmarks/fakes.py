@@ -0,0 +1,61 @@
+"""Синтетические события и доклады для бенчмарков без базы данных"""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from ..plugin import ExportDocsPlugin
+from ..records import ContributionRecord, SpeakerRecord
+from ..util import EventSnapshot
+
+
+# Настройки по умолчанию, чтобы не обращаться к базе; без кэша, чтобы замерять полную генерацию
+SETTINGS = dict(ExportDocsPlugin.default_settings, cache_max_size=0)
+
+# Сборка документа через python-docx, без шаблонов
+DOCX_SETTINGS = dict(SETTINGS, use_templates=False)
+
+AFFILIATIONS = ['МГУ, 3 курс', 'МГУ, магистрант', 'СПбГУ, студент', 'ИТМО, 5 курс',
+                'НИУ ВШЭ', 'МФТИ, 1 курс', 'Bachelor student, KFU', '']
+FIRST_NAMES = ['Иван', 'Анна', 'Петр', 'Мария', 'Алексей', 'Екатерина']
+MIDDLE_NAMES = ['Иванович', 'Петровна', 'Сергеевич', '']
+
+
+def _make_speaker(rnd: random.Random, index: int) -> SpeakerRecord:
+    return SpeakerRecord(rnd.choice(FIRST_NAMES), f'Фамилия{index}', rnd.choice(MIDDLE_NAMES),
+                         rnd.choice(AFFILIATIONS) or None)
+
+
+def make_contributions(count: int, days: int = 1, seed: int = 0) -> List[ContributionRecord]:
+    """Создание докладов, распределенных по дням
+    
+    Примерно у каждого двадцатого доклада нет времени в расписании, у части
+    докладов по два докладчика, примерно у шестой части принята статья.
+    """
+    rnd = random.Random(seed)
+    start = datetime(2025, 4, 1, 9, 0)
+    contributions = []
+    for i in range(count):
+        speakers = [_make_speaker(rnd, i)]
+        if rnd.random() < 0.2:
+            speakers.append(_make_speaker(rnd, i))
+        # Половина докладов со статьей, из них треть принята
+        accepted = rnd.random() < 0.5 and rnd.randrange(3) == 0
+        start_dt = None
+        if i % 20:
+            start_dt = start + timedelta(days=i % days, minutes=rnd.randrange(480))
+        contributions.append(ContributionRecord(i, f'Доклад номер {i} о результатах исследования',
+                                                start_dt, accepted, speakers))
+    return contributions
+
+
+def make_event(count: int, days: int = 1, seed: int = 0) -> SimpleNamespace:
+    """Событие с синтетическими докладами"""
+    return SimpleNamespace(id=0, title=f'Синтетическая конференция: {count} докладов, {days} дн.',
+                           contributions=make_contributions(count, days, seed))
+
+
+def make_snapshot(event: SimpleNamespace) -> EventSnapshot:
+    """Снимок события, как если бы он был загружен из базы"""
+    return EventSnapshot(event.id, event.title, event.contributions)
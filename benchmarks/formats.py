@@ -0,0 +1,32 @@
+"""Время и пиковая память выгрузки одного события в разных форматах"""
+
+import time
+import tracemalloc
+from io import BytesIO
+
+from ..formats import EXPORT_FORMATS, is_format_available
+from ..util import GENERATOR_CLASSES, EventSnapshot
+from .fakes import SETTINGS, make_contributions
+
+
+def run(count: int = 5000, days: int = 5) -> None:
+    snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(count, days))
+    for export_format, fmt in EXPORT_FORMATS.items():
+        if not is_format_available(export_format, SETTINGS):
+            print(f'{export_format:>5}: недоступен')
+            continue
+        for kind, generator_cls in GENERATOR_CLASSES.items():
+            generator = generator_cls(0, snapshot=snapshot, settings=SETTINGS)
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                fmt.write(generator, BytesIO())
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            print(f'{export_format:>5} {kind:>7}: {elapsed:.3f} с, пик {peak / 1024 / 1024:.1f} МБ ({count} докладов)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,95 @@
+"""Время, пиковая память и размер документов трех генераторов на синтетических событиях
+
+    python -m indico_exportdocs.benchmarks.generators --save baseline.json
+    python -m indico_exportdocs.benchmarks.generators --compare baseline.json --tolerance 0.2
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave  # то же через pytest-benchmark
+
+При сравнении с базовыми замерами процесс завершается с кодом 1, если какой-либо
+случай стал медленнее больше чем на заданную долю.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+from ..util import GENERATOR_CLASSES
+from .fakes import SETTINGS, make_event, make_snapshot
+
+
+# Масштабы: (число докладов, число дней)
+SCALES = ((10, 1), (100, 1), (1000, 3), (5000, 5), (20000, 10))
+
+
+def run_case(kind: str, count: int, days: int, repeat: int = 3) -> Dict[str, float]:
+    """Замер одного генератора на одном масштабе (лучшее время из repeat запусков)"""
+    snapshot = make_snapshot(make_event(count, days))
+    generator_cls = GENERATOR_CLASSES[kind]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator_cls(0, snapshot=snapshot, settings=SETTINGS).generate_to_file(BytesIO())
+        timings.append(time.perf_counter() - start)
+    
+    output = BytesIO()
+    tracemalloc.start()
+    try:
+        generator_cls(0, snapshot=snapshot, settings=SETTINGS).generate_to_file(output)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_bytes': peak, 'size_bytes': len(output.getvalue())}
+
+
+def run(scales: Tuple[Tuple[int, int], ...] = SCALES, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for count, days in scales:
+        for kind in GENERATOR_CLASSES:
+            result = run_case(kind, count, days, repeat)
+            results[f'{kind}-{count}x{days}'] = result
+            print(f'{kind:>7} {count:>6} докл. {days:>2} дн.: {result["seconds"]:8.3f} с, '
+                  f'пик {result["peak_bytes"] / 1024 / 1024:7.1f} МБ, файл {result["size_bytes"] / 1024:8.1f} КБ')
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Случаи, ставшие медленнее базовых больше чем на tolerance"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]['seconds']
+        if result['seconds'] > base * (1 + tolerance):
+            regressions.append(f'{name}: {base:.3f} с -> {result["seconds"]:.3f} с')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-count', type=int, help='Пропустить масштабы с большим числом докладов')
+    parser.add_argument('--save', help='Сохранить замеры как базовые в JSON')
+    parser.add_argument('--compare', help='Сравнить с базовыми замерами из JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимое замедление (доля)')
+    args = parser.parse_args(argv)
+    
+    scales = tuple((count, days) for count, days in SCALES if not args.max_count or count <= args.max_count)
+    results = run(scales, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'Замедление: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
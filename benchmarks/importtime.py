@@ -0,0 +1,80 @@
+"""Время импорта плагина при старте процесса Indico (python -X importtime)
+
+Модули Indico загружаются заранее, как в работающем процессе; замеряется только то,
+что добавляет плагин: plugin, controllers и tasks. python-docx, lxml, xlsxwriter и
+генераторы документов при этом загружаться не должны.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+# Модули, которые Indico загружает сам до плагинов
+PRELOAD_MODULES = (
+    'flask',
+    'sqlalchemy',
+    'celery.schedules',
+    'indico.core.plugins',
+    'indico.core.celery',
+    'indico.modules.events.models.events',
+    'indico.modules.events.contributions.models.contributions',
+    'indico.modules.events.papers.models.revisions',
+    'indico.modules.events.timetable.models.entries',
+    'indico.modules.events.management.controllers.base',
+    'indico.modules.categories.controllers.base',
+)
+
+# Модули плагина, которые загружаются при старте веб-процесса и процесса Celery
+BOOT_MODULES = ('plugin', 'controllers', 'tasks')
+
+# Модули, которые должны загружаться только при первой выгрузке
+LAZY_MODULES = ('docx', 'lxml.etree', 'xlsxwriter', 'util', 'engine', 'formats', 'preview')
+
+MARKER = 'exportdocs-importtime-start'
+
+
+def _child_code(package: str) -> str:
+    preload = '; '.join(f'import {module}' for module in PRELOAD_MODULES)
+    boot = '; '.join(f'import {package}.{module}' for module in BOOT_MODULES)
+    lazy = [module if '.' in module or module in ('docx', 'xlsxwriter') else f'{package}.{module}'
+            for module in LAZY_MODULES]
+    return (f'import sys, json; {preload}; sys.stderr.write("{MARKER}\\n"); sys.stderr.flush(); {boot}; '
+            f'print(json.dumps([name for name in {lazy!r} if name in sys.modules]))')
+
+
+def measure(package: str) -> tuple:
+    """Суммарное собственное время импортов после загрузки Indico (мкс), самые долгие и лишние модули"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _child_code(package)],
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f'Не удалось импортировать плагин:\n{result.stderr[-2000:]}')
+    lines = result.stderr.splitlines()
+    lines = lines[lines.index(MARKER) + 1:]
+    timings = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        timings.append((int(self_us), name.strip()))
+    eager = json.loads(result.stdout.strip().splitlines()[-1])
+    return sum(self_us for self_us, _ in timings), sorted(timings, reverse=True)[:10], eager
+
+
+def run(package: str, budget_ms: float) -> int:
+    total_us, slowest, eager = measure(package)
+    print(f'импорт плагина: {total_us / 1000:.1f} мс (бюджет {budget_ms:.0f} мс)')
+    for self_us, name in slowest:
+        print(f'  {self_us / 1000:8.1f} мс  {name}')
+    if eager:
+        print('загружены при старте, хотя нужны только для выгрузки:', ', '.join(eager))
+    return 0 if total_us <= budget_ms * 1000 and not eager else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--package', default='indico_exportdocs', help='имя пакета плагина')
+    parser.add_argument('--budget', type=float, default=100, help='допустимое время импорта, мс')
+    args = parser.parse_args()
+    sys.exit(run(args.package, args.budget))
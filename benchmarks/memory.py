@@ -0,0 +1,61 @@
+"""Пиковая память при выдаче документа: bytes с копиями против записи во временный файл"""
+
+import tracemalloc
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from ..util import SPOOL_MAX_SIZE, ContributionsListGenerator, EventSnapshot
+from .fakes import DOCX_SETTINGS, SETTINGS, make_contributions
+
+
+CHUNK_SIZE = 8192
+
+
+def _send(fileobj) -> None:
+    """Чтение ответа блоками, как это делает WSGI-сервер"""
+    while fileobj.read(CHUNK_SIZE):
+        pass
+
+
+def bytes_path(snapshot: EventSnapshot) -> None:
+    """Прежний путь: Document.save в BytesIO, getvalue() и еще одна обертка BytesIO для send_file"""
+    generator = ContributionsListGenerator(0, snapshot=snapshot, settings=DOCX_SETTINGS)
+    generator._build_document()
+    f = BytesIO()
+    generator.doc.save(f)
+    docx_bytes = f.getvalue()
+    _send(BytesIO(docx_bytes))
+
+
+def spooled_path(snapshot: EventSnapshot, settings: dict = DOCX_SETTINGS) -> None:
+    """Новый путь: запись во временный файл, который отдается блоками"""
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as fileobj:
+        ContributionsListGenerator(0, snapshot=snapshot, settings=settings).generate_to_file(fileobj)
+        fileobj.seek(0)
+        _send(fileobj)
+
+
+def template_path(snapshot: EventSnapshot) -> None:
+    """Запись во временный файл с телом документа из шаблона"""
+    spooled_path(snapshot, SETTINGS)
+
+
+def measure(func, snapshot: EventSnapshot) -> int:
+    tracemalloc.start()
+    try:
+        func(snapshot)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes=(1000, 5000, 20000)) -> None:
+    for size in sizes:
+        snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(size, days=5))
+        for func in (bytes_path, spooled_path, template_path):
+            peak = measure(func, snapshot)
+            print(f'{func.__name__:>12}: {size:>6} докладов, пик {peak / 1024 / 1024:.1f} МБ')
+
+
+if __name__ == '__main__':
+    run()
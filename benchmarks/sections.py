@@ -0,0 +1,34 @@
+"""Повторная генерация многодневного события с кэшем разделов после правки одного дня"""
+
+import tempfile
+import time
+from io import BytesIO
+
+from ..cache import ExportCache
+from ..util import GENERATOR_CLASSES, EventSnapshot
+from .fakes import SETTINGS, make_event
+
+
+def _generate(generator_cls, event, cache: ExportCache) -> float:
+    start = time.perf_counter()
+    snapshot = EventSnapshot(event.id, event.title, event.contributions)
+    generator_cls(0, snapshot=snapshot, settings=SETTINGS, section_cache=cache).generate_to_file(BytesIO())
+    return time.perf_counter() - start
+
+
+def run(count: int = 5000, days: int = 10) -> None:
+    for kind, generator_cls in GENERATOR_CLASSES.items():
+        event = make_event(count, days)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ExportCache(directory, 1024 ** 3)
+            cold = _generate(generator_cls, event, cache)
+            # Правка одного доклада затрагивает только его день
+            event.contributions[1].title += ' (исправлено)'
+            edited = _generate(generator_cls, event, cache)
+            warm = _generate(generator_cls, event, cache)
+        print(f'{kind:>7}: {count} докладов, {days} дн.: без кэша {cold:.3f} с, '
+              f'после правки одного дня {edited:.3f} с, без изменений {warm:.3f} с')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,49 @@
+"""Сравнение оформления через стили с прежним проходом по всем элементам документа"""
+
+import time
+
+from ..util import ContributionsListGenerator, DocxGenerator, EventSnapshot
+from .fakes import DOCX_SETTINGS, make_contributions
+
+
+def legacy_styling_pass(generator: DocxGenerator) -> None:
+    """Прежнее оформление: обход всех абзацев, таблиц, строк, ячеек и фрагментов"""
+    font = generator.FONT_SETTINGS
+    for paragraph in generator.doc.paragraphs:
+        for run in paragraph.runs:
+            run.font.name = font['name']
+            run.font.size = font['size']
+            run.font.color.rgb = font['color']
+        paragraph.paragraph_format.line_spacing = generator.LINE_SPACING
+    for table in generator.doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    for run in paragraph.runs:
+                        run.font.name = font['name']
+                        run.font.size = font['size']
+                        run.font.color.rgb = font['color']
+                    paragraph.paragraph_format.line_spacing = generator.LINE_SPACING
+
+
+class LegacyStyledListGenerator(ContributionsListGenerator):
+    """Список докладов с прежним проходом оформления перед сохранением"""
+
+    def _write_package(self, fileobj) -> None:
+        legacy_styling_pass(self)
+        super()._write_package(fileobj)
+
+
+def run(rows: int = 2000, repeat: int = 3) -> None:
+    snapshot = EventSnapshot(0, 'Бенчмарк', make_contributions(rows))
+    for generator_cls in (LegacyStyledListGenerator, ContributionsListGenerator):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            generator_cls(0, snapshot=snapshot, settings=DOCX_SETTINGS).generate()
+            timings.append(time.perf_counter() - start)
+        print(f'{generator_cls.__name__}: {min(timings):.3f} с ({rows} строк)')
+
+
+if __name__ == '__main__':
+    run()
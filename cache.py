@@ -0,0 +1,269 @@
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from indico.core.cache import make_scoped_cache
+from indico.core.config import config
+from indico.core.db import db
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.models.events import Event
+from indico.modules.events.models.persons import EventPerson
+from indico.modules.events.papers.models.revisions import PaperRevision
+from indico.modules.events.timetable.models.entries import TimetableEntry
+from sqlalchemy import func, literal_column
+
+from .admission import POLL_INTERVAL, ExportQueueFull
+from .metrics import report_admission, track_queue_depth
+
+
+# Счетчики изменений событий, обновляемые по сигналам Indico
+_generations = make_scoped_cache('exportdocs-generations')
+
+
+def invalidate_event_exports(event_id: int) -> None:
+    """Сброс кэшированных документов события"""
+    _generations.set(str(event_id), uuid4().hex)
+
+
+# Настройки плагина, от которых зависит содержимое документов
+CONTENT_SETTINGS = ('date_language', 'sort_order', 'student_keywords', 'master_keywords', 'use_templates',
+                    'templates_path')
+
+
+def get_content_version() -> str:
+    """Версия оформления документов: настройки, влияющие на содержимое, и версия шаблонов"""
+    from .plugin import ExportDocsPlugin
+    settings = ExportDocsPlugin.settings.get_all()
+    data = [repr(tuple(settings[name] for name in CONTENT_SETTINGS))]
+    if settings['use_templates']:
+        # Движок и python-docx загружаются только при выгрузке, а не при старте процесса
+        from .util import get_template_engine
+        data.append(get_template_engine(settings['templates_path']).templates_version())
+    return hashlib.sha1('\n'.join(data).encode('utf-8')).hexdigest()
+
+
+# Поля людей, которые выводятся в документы
+PERSON_COLUMNS = ('first_name', 'last_name', 'middle_name', 'affiliation')
+
+
+def get_event_fingerprint(event_id: int) -> str:
+    """Дешевый отпечаток документов события
+    
+    Учитывает выводимые поля докладов и докладчиков (свернутые в хэши в базе данных),
+    последние изменения статей, а также версию настроек и шаблонов оформления:
+    после их правки документы строятся заново. Поэтому документ, построенный по
+    данным до фиксации правки, не попадает под ключ новых данных.
+    """
+    # Диалект PostgreSQL уже загружен движком базы к первому запросу, но не при старте плагина
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+    event_title = db.session.query(Event.title).filter(Event.id == event_id).scalar()
+    # Название, время и отбираемые фильтром поля докладов свертываются в хэш так же, как данные людей
+    contribution_data = func.concat_ws('|', Contribution.id, Contribution.title, TimetableEntry.start_dt,
+                                       Contribution.session_id, Contribution.track_id, Contribution.type_id)
+    contributions = (db.session.query(func.count(Contribution.id), func.max(Contribution.id),
+                                      func.md5(func.string_agg(contribution_data, aggregate_order_by(
+                                          literal_column("','"), Contribution.id))))
+                     .outerjoin(TimetableEntry, TimetableEntry.contribution_id == Contribution.id)
+                     .filter(Contribution.event_id == event_id, ~Contribution.is_deleted)
+                     .one())
+    # Правка имени или организации не меняет связей, поэтому выводимые поля свертываются в хэш;
+    # отчество есть не во всех версиях Indico
+    person_columns = [getattr(EventPerson, name) for name in PERSON_COLUMNS if hasattr(EventPerson, name)]
+    person_data = func.concat_ws('|', ContributionPersonLink.id, ContributionPersonLink.person_id,
+                                 ContributionPersonLink.is_speaker, *person_columns)
+    person_links = (db.session.query(func.count(ContributionPersonLink.id), func.max(ContributionPersonLink.id),
+                                     func.md5(func.string_agg(person_data, aggregate_order_by(
+                                         literal_column("','"), ContributionPersonLink.id))))
+                    .join(Contribution, ContributionPersonLink.contribution_id == Contribution.id)
+                    .join(EventPerson, ContributionPersonLink.person_id == EventPerson.id)
+                    .filter(Contribution.event_id == event_id, ~Contribution.is_deleted)
+                    .one())
+    revisions = (db.session.query(func.count(PaperRevision.id),
+                                  func.max(PaperRevision.submitted_dt),
+                                  func.max(PaperRevision.judgment_dt))
+                 .join(Contribution, PaperRevision._contribution_id == Contribution.id)
+                 .filter(Contribution.event_id == event_id, ~Contribution.is_deleted)
+                 .one())
+    generation = _generations.get(str(event_id))
+    data = repr((event_title, tuple(contributions), tuple(person_links), tuple(revisions), generation,
+                 get_content_version()))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def get_export_key(event_id: int, kind: str, export_format: str, fingerprint: str, filter_key: str = '') -> str:
+    """Ключ документа в кэше; общий для запросов, фоновых задач и прогрева"""
+    key = f'{event_id}-{kind}-{export_format}-{fingerprint}'
+    return f'{key}?{filter_key}' if filter_key else key
+
+
+# Файлы блокировок старше этого времени, с, удаляются при вытеснении
+LOCK_TTL = 24 * 60 * 60
+
+# Через сколько записей каталог сканируется, даже если оценка размера в пределах лимита:
+# оценка учитывает только записи своего процесса
+EVICT_CHECK_INTERVAL = 100
+
+# Оценка занятого места по каталогам кэша: [размер после сканирования плюс записанное, записей с тех пор]
+_usage: Dict[str, List[int]] = {}
+_usage_lock = threading.Lock()
+
+
+def _try_flock(lock: BinaryIO) -> bool:
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class ExportCache:
+    """Дисковый кэш документов с вытеснением давно не использованных файлов
+    
+    wait_timeout ограничивает ожидание документа, который строит другой запрос;
+    None — ждать без ограничения.
+    """
+    
+    def __init__(self, directory: str, max_size: int, wait_timeout: Optional[float] = None):
+        self.directory = directory
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+    
+    def get(self, key: str) -> Optional[str]:
+        """Путь к файлу в кэше или None; обращение продлевает жизнь файла"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+    
+    def set(self, key: str, data: bytes) -> str:
+        """Сохранение документа в кэш с последующим вытеснением лишнего"""
+        return self.set_from(key, lambda f: f.write(data))
+    
+    def set_from(self, key: str, write: Callable[[BinaryIO], None]) -> str:
+        """Сохранение документа, который записывается в файл кэша напрямую"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self._needs_eviction(size):
+            self._evict()
+        return path
+    
+    def get_or_set(self, key: str, write: Callable[[BinaryIO], None]) -> Tuple[str, bool]:
+        """Документ из кэша или его генерация; возвращает путь и признак, что документ создан здесь
+        
+        Одновременные запросы одного документа (в том числе из разных процессов) ждут
+        на файловой блокировке, пока первый запрос строит документ, и получают его результат.
+        Ожидающие учитываются в глубине очереди и получают 503, если не дождались за wait_timeout.
+        """
+        path = self.get(key)
+        if path is not None:
+            return path, False
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f'{self._path(key)}.lock', 'wb') as lock:
+            self._lock(lock)
+            try:
+                path = self.get(key)
+                if path is not None:
+                    return path, False
+                return self.set_from(key, write), True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _lock(self, lock: BinaryIO) -> None:
+        if self.wait_timeout is None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return
+        if _try_flock(lock):
+            return
+        start = time.monotonic()
+        with track_queue_depth():
+            while time.monotonic() - start < self.wait_timeout:
+                time.sleep(POLL_INTERVAL)
+                if _try_flock(lock):
+                    return
+        report_admission('rejected', time.monotonic() - start)
+        raise ExportQueueFull()
+    
+    def _needs_eviction(self, size: int) -> bool:
+        """Учет записанного файла; каталог сканируется, только если оценка превысила лимит или пора сверить ее"""
+        with _usage_lock:
+            usage = _usage.get(self.directory)
+            if usage is None:
+                return True
+            usage[0] += size
+            usage[1] += 1
+            return usage[0] > self.max_size or usage[1] >= EVICT_CHECK_INTERVAL
+    
+    def _evict(self) -> None:
+        """Удаление давно не использованных файлов сверх лимита размера"""
+        entries = []
+        lock_deadline = time.time() - LOCK_TTL
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            elif entry.name.endswith('.lock') and entry.stat().st_mtime < lock_deadline:
+                # Блокировки не удаляются сразу: их могут ждать другие процессы
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+        with _usage_lock:
+            _usage[self.directory] = [total_size, 0]
+
+
+def get_export_cache() -> ExportCache:
+    """Кэш документов с лимитом и временем ожидания из настроек плагина"""
+    from .plugin import ExportDocsPlugin
+    settings = ExportDocsPlugin.settings.get_all()
+    return ExportCache(os.path.join(config.CACHE_DIR, 'exportdocs'), settings['cache_max_size'] * 1024 * 1024,
+                       settings['export_queue_timeout'])
+
+
+def get_section_cache(cache_max_size: int) -> ExportCache:
+    """Кэш отрендеренных разделов (заседаний) документов; лимит в МБ как у кэша документов"""
+    return ExportCache(os.path.join(config.CACHE_DIR, 'exportdocs', 'sections'), cache_max_size * 1024 * 1024)
+
+
+# Минимальный размер хранилища результатов фоновых задач при отключенном кэше
+JOB_STORAGE_MIN_SIZE = 64 * 1024 * 1024
+
+
+def get_job_storage() -> ExportCache:
+    """Хранилище результатов фоновых задач (работает и при отключенном кэше документов)"""
+    cache = get_export_cache()
+    if cache.enabled:
+        return cache
+    return ExportCache(os.path.join(cache.directory, 'jobs'), JOB_STORAGE_MIN_SIZE, cache.wait_timeout)
@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+
+# Ключевые слова по умолчанию (настраиваются в плагине)
+STUDENT_KEYWORDS = ('студент', 'student', 'бакалавр', 'bachelor', '1 курс', '2 курс', '3 курс', '4 курс')
+MASTER_KEYWORDS = ('магистр', 'master', 'магистрант', '5 курс', '6 курс')
+
+STATUS_UNKNOWN = 'Не указан'
+STATUS_STUDENT = 'Студент'
+STATUS_MASTER = 'Магистр'
+
+
+def parse_keywords(text: str) -> Tuple[str, ...]:
+    """Ключевые слова из настройки: по одному на строке"""
+    return tuple(line.strip().lower() for line in text.splitlines() if line.strip())
+
+
+class AffiliationClassifier:
+    """Определение статуса участника по affiliation одним регулярным выражением
+    
+    Оба набора ключевых слов проверяются за один проход через просмотр вперед;
+    студенческие слова приоритетнее магистерских. Результаты запоминаются для
+    каждой различной строки affiliation.
+    """
+    
+    def __init__(self, student_keywords: Iterable[str], master_keywords: Iterable[str], cache_size: int = 4096):
+        self._regex = re.compile(
+            f'(?=.*?(?P<student>{self._alternation(student_keywords)}))?'
+            f'(?=.*?(?P<master>{self._alternation(master_keywords)}))?',
+            re.DOTALL
+        )
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+    
+    @staticmethod
+    def _alternation(keywords: Iterable[str]) -> str:
+        # Длинные слова первыми, пустой набор не совпадает ни с чем
+        escaped = [re.escape(kw.lower()) for kw in sorted(set(keywords), key=len, reverse=True) if kw]
+        return '|'.join(escaped) or '(?!)'
+    
+    def _classify(self, affiliation: Optional[str]) -> str:
+        if not affiliation:
+            return STATUS_UNKNOWN
+        match = self._regex.match(affiliation.lower())
+        if match.group('student'):
+            return STATUS_STUDENT
+        if match.group('master'):
+            return STATUS_MASTER
+        return affiliation
+
+
+@lru_cache(maxsize=8)
+def _get_classifier(student_keywords: Tuple[str, ...], master_keywords: Tuple[str, ...]) -> AffiliationClassifier:
+    return AffiliationClassifier(student_keywords, master_keywords)
+
+
+def get_affiliation_classifier(settings: dict) -> AffiliationClassifier:
+    """Классификатор для ключевых слов из настроек; пересобирается только при их изменении"""
+    return _get_classifier(parse_keywords(settings['student_keywords']),
+                           parse_keywords(settings['master_keywords']))
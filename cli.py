@@ -0,0 +1,27 @@
+import click
+from indico.cli.core import cli_group
+
+from .batch import export_events_archive, get_batch_settings
+
+
+EXPORT_KINDS = ('list', 'report', 'papers')
+
+
+@cli_group(name='exportdocs')
+def cli():
+    """Экспорт документов событий в DOCX"""
+
+
+@cli.command()
+@click.argument('event_ids', nargs=-1, type=int, required=True)
+@click.option('--kind', '-k', 'kinds', multiple=True, type=click.Choice(EXPORT_KINDS),
+              help='Тип документа (можно указать несколько, по умолчанию все)')
+@click.option('--output', '-o', type=click.File('wb'), required=True, help='Путь к ZIP-архиву')
+@click.option('--workers', '-w', type=int, help='Число процессов (по умолчанию из настроек плагина)')
+@click.option('--timeout', '-t', type=int, help='Таймаут генерации одного документа, секунды')
+def batch(event_ids, kinds, output, workers, timeout):
+    """Пакетный экспорт документов нескольких событий в ZIP-архив"""
+    default_workers, default_timeout = get_batch_settings()
+    export_events_archive(event_ids, kinds or EXPORT_KINDS, output,
+                          workers=workers or default_workers, timeout=timeout or default_timeout)
+    click.echo(f'Архив сохранен: {output.name}')
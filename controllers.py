@@ -1,8 +1,18 @@
-from flask import send_file, render_template_string
-from indico.core.plugins import IndicoPluginBlueprint
-from io import BytesIO
-from .util import generate_docx_list, generate_docx_report, generate_docx_papers
+from flask import jsonify, request, send_file, session, render_template_string, stream_with_context
+from indico.core.plugins import IndicoPluginBlueprint, url_for_plugin
+from werkzeug.exceptions import BadRequest, NotFound
+from werkzeug.wrappers import Response
+from markupsafe import escape
+from tempfile import SpooledTemporaryFile
+from typing import Optional
+from .admission import ExportQueueFull, ExportSlot, acquire_export_slot
+from .cache import get_event_fingerprint, get_export_cache, get_export_key, get_job_storage
+from .filters import ExportFilter, get_contribution_list_filter
+from .metrics import ExportTimer
+from .tasks import JOB_DONE, get_export_job, start_export_job
+from indico.modules.categories.controllers.base import RHManageCategoryBase
 from indico.modules.events.management.controllers.base import RHManageEventBase
+from indico.modules.events.models.events import Event
 
 blueprint = IndicoPluginBlueprint(
     'exportdocs',
@@ -10,20 +20,159 @@ blueprint = IndicoPluginBlueprint(
     url_prefix='/event/<int:event_id>/manage'
 )
 
-@blueprint.route('/export/list')
-def export_list(event_id):
-    docx_bytes = generate_docx_list(event_id)
-    return send_file(BytesIO(docx_bytes), as_attachment=True, download_name='list.docx')
+category_blueprint = IndicoPluginBlueprint(
+    'exportdocs_batch',
+    __name__,
+    url_prefix='/category/<int:category_id>/manage'
+)
+
+def _send_export(event_id: int, kind: str):
+    """Отправка документа из кэша или генерация, если данные события изменились"""
+    # Генераторы, python-docx и форматы загружаются при первой выгрузке, а не при старте процесса
+    from .formats import EXPORT_FORMATS, is_format_available
+    from .util import get_export_settings
+    export_format = request.args.get('format', 'docx')
+    if export_format not in EXPORT_FORMATS or not is_format_available(export_format, get_export_settings()):
+        raise BadRequest(f'Формат выгрузки недоступен: {export_format}')
+    export_filter = _get_export_filter(event_id)
+    timer = ExportTimer(kind if export_format == 'docx' else f'{kind}.{export_format}', event_id)
+    try:
+        with timer.track_queries():
+            response = _make_export_response(event_id, kind, export_format, timer, export_filter)
+    except ExportQueueFull as exc:
+        return _queue_full_response(exc)
+    response.headers['Server-Timing'] = timer.server_timing()
+    # Замеры пишутся после отправки ответа, чтобы учесть и потоковую выгрузку
+    response.call_on_close(timer.report)
+    return response
+
+
+def _get_export_filter(event_id: int) -> ExportFilter:
+    """Отбор докладов из параметров запроса; с list_filter — и из настроек списка докладов Indico"""
+    try:
+        if request.args.get('list_filter'):
+            return get_contribution_list_filter(Event.get_or_404(event_id, is_deleted=False), request.args)
+        return ExportFilter.from_args(request.args)
+    except ValueError as exc:
+        raise BadRequest(str(exc))
+
+
+def _queue_full_response(exc: ExportQueueFull) -> Response:
+    """Ответ 503 с заголовком Retry-After
+    
+    Обработчик ошибок Indico рендерит собственную страницу по исключению и не
+    переносит его заголовки, поэтому ответ собирается здесь.
+    """
+    return exc.get_response()
+
+
+def _acquire_slot(event_id: Optional[int], timer: ExportTimer) -> ExportSlot:
+    """Слот для построения документа; ожидание в очереди замеряется отдельной фазой"""
+    with timer.phase('queue'):
+        return acquire_export_slot(event_id)
+
+
+def _make_export_response(event_id: int, kind: str, export_format: str, timer: ExportTimer,
+                          export_filter: ExportFilter):
+    from .formats import (ALL_DOCUMENTS, EXPORT_FORMATS, generate_export_file, get_download_name,
+                          get_export_generator, get_mimetype, write_export)
+    with timer.phase('fingerprint'):
+        fingerprint = get_event_fingerprint(event_id)
+    filter_key = export_filter.key()
+    etag = f'{kind}-{export_format}-{fingerprint}' + (f'-{filter_key}' if filter_key else '')
+    if request.if_none_match.contains(etag):
+        timer.cached = True
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    fmt = EXPORT_FORMATS[export_format]
+    download_name = get_download_name(kind, export_format)
+    mimetype = get_mimetype(kind, export_format)
+    cache = get_export_cache()
+    if not cache.enabled and fmt.stream and kind != ALL_DOCUMENTS:
+        # Без кэша CSV/TSV отдаются по мере построения строк; слот занят, пока идет отдача
+        slot = _acquire_slot(event_id, timer)
+        try:
+            generator = get_export_generator(kind, event_id, timer=timer, export_filter=export_filter)
+        except BaseException:
+            slot.release()
+            raise
+        response = Response(stream_with_context(fmt.stream(generator)), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        response.set_etag(etag)
+        response.call_on_close(slot.release)
+        return response
+    if not cache.enabled:
+        with _acquire_slot(event_id, timer):
+            fileobj = generate_export_file(kind, event_id, export_format, timer=timer, export_filter=export_filter)
+        return send_file(fileobj, as_attachment=True, download_name=download_name, mimetype=mimetype, etag=etag)
+    
+    def _write(fileobj) -> None:
+        with _acquire_slot(event_id, timer):
+            write_export(kind, event_id, fileobj, export_format, timer=timer, export_filter=export_filter)
+    
+    key = get_export_key(event_id, kind, export_format, fingerprint, filter_key)
+    # Одновременные запросы одного документа строят его один раз, и слот занимает только построение
+    path, created = cache.get_or_set(key, _write)
+    timer.cached = not created
+    return send_file(path, as_attachment=True, download_name=download_name, mimetype=mimetype, etag=etag)
+
+class RHExportDocument(RHManageEventBase):
+    """Выгрузка документа события; тип документа задается правилом маршрута."""
+    
+    def _process(self):
+        return _send_export(self.event.id, request.view_args['kind'])
 
-@blueprint.route('/export/report')
-def export_report(event_id):
-    docx_bytes = generate_docx_report(event_id)
-    return send_file(BytesIO(docx_bytes), as_attachment=True, download_name='report.docx')
+blueprint.add_url_rule('/export/list', 'export_list', RHExportDocument, defaults={'kind': 'list'})
+blueprint.add_url_rule('/export/report', 'export_report', RHExportDocument, defaults={'kind': 'report'})
+blueprint.add_url_rule('/export/papers', 'export_papers', RHExportDocument, defaults={'kind': 'papers'})
+blueprint.add_url_rule('/export/all', 'export_all', RHExportDocument, defaults={'kind': 'all'})
 
-@blueprint.route('/export/papers')
-def export_papers(event_id):
-    docx_bytes = generate_docx_papers(event_id)
-    return send_file(BytesIO(docx_bytes), as_attachment=True, download_name='papers.docx')
+
+def _get_event_job(event_id: int, job_id: str) -> dict:
+    job = get_export_job(job_id)
+    if job is None or job['event_id'] != event_id:
+        raise NotFound('Задача экспорта не найдена')
+    return job
+
+
+class RHExportJobStart(RHManageEventBase):
+    """Постановка генерации документа в фоновую очередь."""
+    
+    def _process(self):
+        job_id = start_export_job(self.event.id, request.view_args['kind'], _get_export_filter(self.event.id))
+        return jsonify(job_id=job_id,
+                       status_url=url_for_plugin('.export_job_status', event_id=self.event.id, job_id=job_id))
+
+
+class RHExportJobStatus(RHManageEventBase):
+    """Состояние фоновой генерации документа."""
+    
+    def _process(self):
+        job_id = request.view_args['job_id']
+        job = _get_event_job(self.event.id, job_id)
+        download_url = None
+        if job['state'] == JOB_DONE:
+            download_url = url_for_plugin('.export_job_download', event_id=self.event.id, job_id=job_id)
+        return jsonify(state=job['state'], progress=job['progress'], download_url=download_url)
+
+
+class RHExportJobDownload(RHManageEventBase):
+    """Скачивание документа, построенного фоновой задачей."""
+    
+    def _process(self):
+        from .formats import get_download_name
+        job = _get_event_job(self.event.id, request.view_args['job_id'])
+        path = get_job_storage().get(job['key']) if job['state'] == JOB_DONE else None
+        if path is None:
+            raise NotFound('Документ еще не готов или удален из хранилища')
+        return send_file(path, as_attachment=True, download_name=get_download_name(job['kind']))
+
+blueprint.add_url_rule('/export/<any(list,report,papers,all):kind>/jobs', 'export_job_start', RHExportJobStart,
+                       methods=('POST',))
+blueprint.add_url_rule('/export/jobs/<job_id>', 'export_job_status', RHExportJobStatus)
+blueprint.add_url_rule('/export/jobs/<job_id>/download', 'export_job_download', RHExportJobDownload)
 
 class RHExportDocs(RHManageEventBase):
     """Контроллер для отображения страницы экспорта документов."""
@@ -34,6 +183,7 @@ class RHExportDocs(RHManageEventBase):
         <html>
         <head>
             <title>Экспорт документов - {self.event.title}</title>
+            <meta name="csrf-token" id="csrf-token" content="{session.csrf_token}">
             <style>
                 body {{ 
                     font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; 
@@ -156,23 +306,29 @@ class RHExportDocs(RHManageEventBase):
                 
                 <div class="content">
                     <div class="buttons">
-                        <a href="/event/{self.event.id}/manage/export/list" class="btn highlight">
+                        <a href="/event/{self.event.id}/manage/export/list" data-export-async class="btn highlight">
                             <span class="btn-icon">📋</span>
                             <div class="btn-title">Список докладов</div>
                             <div class="btn-desc">Таблица по дням: №, ФИО+название, Статус, Решение</div>
                         </a>
                         
-                        <a href="/event/{self.event.id}/manage/export/report" class="btn">
+                        <a href="/event/{self.event.id}/manage/export/report" data-export-async class="btn">
                             <span class="btn-icon">📊</span>
                             <div class="btn-title">Отчет о проведении</div>
                             <div class="btn-desc">Пронумерованный список по дням: "1. ФИО. Название доклада"</div>
                         </a>
                         
-                        <a href="/event/{self.event.id}/manage/export/papers" class="btn">
+                        <a href="/event/{self.event.id}/manage/export/papers" data-export-async class="btn">
                             <span class="btn-icon">📝</span>
                             <div class="btn-title">Список публикаций</div>
                             <div class="btn-desc">Статьи по дням со статусом "приняты к публикации"</div>
                         </a>
+                        
+                        <a href="/event/{self.event.id}/manage/export/all" data-export-async class="btn">
+                            <span class="btn-icon">🗂️</span>
+                            <div class="btn-title">Все документы</div>
+                            <div class="btn-desc">Список докладов, отчет и список публикаций одним ZIP-архивом</div>
+                        </a>
                     </div>
                     
                     <div class="info">
@@ -185,6 +341,8 @@ class RHExportDocs(RHManageEventBase):
                         </ul>
                         <p><strong>Время берется из расписания (timetable)</strong> каждого доклада. Доклады группируются по датам.</p>
                         <p><strong>Оформление по ГОСТ:</strong> Times New Roman 14 пт, межстрочный интервал 1,5, поля 20/10/20/20 мм.</p>
+                        <p><strong>Предпросмотр без скачивания:</strong> <a href="/event/{self.event.id}/manage/export/list/preview">список докладов</a>, <a href="/event/{self.event.id}/manage/export/report/preview">отчет о проведении</a>, <a href="/event/{self.event.id}/manage/export/papers/preview">список публикаций</a>.</p>
+                        <p><strong>Другие форматы:</strong> параметр <code>?format=csv</code>, <code>tsv</code>, <code>xlsx</code>, <code>odt</code> или <code>pdf</code> у ссылки на документ, например <a href="/event/{self.event.id}/manage/export/list?format=xlsx">список докладов в XLSX</a>.</p>
                     </div>
                     
                     <div class="back-link">
@@ -192,6 +350,7 @@ class RHExportDocs(RHManageEventBase):
                     </div>
                 </div>
             </div>
+            <script src="{url_for_plugin('exportdocs.static', filename='js/contributions_export.js')}"></script>
         </body>
         </html>
         '''
@@ -199,3 +358,125 @@ class RHExportDocs(RHManageEventBase):
 
 #  маршрут для страницы экспорта
 blueprint.add_url_rule('/export', 'export_buttons', RHExportDocs)
+
+
+# Названия документов для страницы предпросмотра
+PREVIEW_TITLES = {
+    'list': 'Список докладов',
+    'report': 'Отчет о проведении',
+    'papers': 'Список публикаций',
+}
+
+class RHExportPreviewDays(RHManageEventBase):
+    """Список разделов (дней) документа для предпросмотра."""
+    
+    def _process(self):
+        from .preview import get_preview_summary
+        kind = request.view_args['kind']
+        summary = get_preview_summary(self.event.id, kind)
+        days = [dict(day, url=url_for_plugin('.export_preview_day', event_id=self.event.id, kind=kind,
+                                             index=day['index']))
+                for day in summary['days']]
+        return jsonify(dict(summary, days=days))
+
+blueprint.add_url_rule('/export/<any(list,report,papers):kind>/preview/days', 'export_preview_days',
+                       RHExportPreviewDays)
+
+
+class RHExportPreviewDay(RHManageEventBase):
+    """Страница докладов одного раздела документа для предпросмотра."""
+    
+    def _process(self):
+        from .preview import get_preview_page
+        page = get_preview_page(self.event.id, request.view_args['kind'], request.view_args['index'],
+                                request.args.get('page', 1, type=int))
+        if page is None:
+            raise NotFound('Раздел не найден')
+        return jsonify(page)
+
+blueprint.add_url_rule('/export/<any(list,report,papers):kind>/preview/days/<int:index>', 'export_preview_day',
+                       RHExportPreviewDay)
+
+
+class RHExportPreview(RHManageEventBase):
+    """Предпросмотр документа в HTML: разделы загружаются по мере раскрытия."""
+    
+    def _process(self):
+        kind = request.view_args['kind']
+        days_url = url_for_plugin('.export_preview_days', event_id=self.event.id, kind=kind)
+        download_url = url_for_plugin(f'.export_{kind}', event_id=self.event.id)
+        html = f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Предпросмотр: {PREVIEW_TITLES[kind]} - {escape(self.event.title)}</title>
+            <meta name="csrf-token" id="csrf-token" content="{session.csrf_token}">
+            <style>
+                body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Arial, sans-serif; margin: 0; padding: 20px; background: #f8f9fa; color: #333; }}
+                .container {{ max-width: 1100px; margin: 0 auto; background: white; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); padding: 30px; }}
+                .toolbar {{ display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; }}
+                .toolbar a {{ color: #667eea; text-decoration: none; }}
+                .download {{ padding: 10px 20px; border-radius: 6px; background: #28a745; color: white !important; }}
+                details {{ border: 1px solid #e9ecef; border-radius: 6px; margin: 10px 0; }}
+                summary {{ padding: 12px 16px; cursor: pointer; font-weight: 600; }}
+                summary .date, summary .count {{ font-weight: normal; opacity: 0.7; margin-left: 10px; }}
+                table {{ width: 100%; border-collapse: collapse; }}
+                th, td {{ border-top: 1px solid #e9ecef; padding: 6px 10px; text-align: left; vertical-align: top; }}
+                th {{ background: #f1f3f5; }}
+                .more {{ margin: 10px 16px; }}
+                .empty {{ padding: 20px; text-align: center; opacity: 0.7; }}
+            </style>
+        </head>
+        <body>
+            <div class="container" id="export-preview" data-days-url="{days_url}">
+                <div class="toolbar">
+                    <a href="{url_for_plugin('.export_buttons', event_id=self.event.id)}">← Экспорт документов</a>
+                    <a class="download" href="{download_url}" data-export-async><span>Скачать DOCX</span></a>
+                </div>
+                <h1 class="preview-title">{PREVIEW_TITLES[kind]}</h1>
+                <p class="preview-event">{escape(self.event.title)}</p>
+                <div class="preview-days"><div class="empty">Загрузка…</div></div>
+            </div>
+            <script src="{url_for_plugin('exportdocs.static', filename='js/contributions_export.js')}"></script>
+            <script src="{url_for_plugin('exportdocs.static', filename='js/export_preview.js')}"></script>
+        </body>
+        </html>
+        '''
+        return html
+
+blueprint.add_url_rule('/export/<any(list,report,papers):kind>/preview', 'export_preview', RHExportPreview)
+
+
+class RHBatchExportDocs(RHManageCategoryBase):
+    """Пакетный экспорт документов событий категории в ZIP-архив.
+    
+    Параметры запроса: event_id (можно несколько, по умолчанию все события
+    категории) и kind (можно несколько, по умолчанию все типы документов).
+    """
+    
+    def _process(self):
+        from .batch import export_events_archive, get_batch_settings
+        from .util import GENERATOR_CLASSES, SPOOL_MAX_SIZE
+        category_event_ids = {event_id for event_id, in (Event.query
+                                                         .filter_by(category_id=self.category.id, is_deleted=False)
+                                                         .with_entities(Event.id))}
+        event_ids = request.args.getlist('event_id', type=int) or sorted(category_event_ids)
+        if not set(event_ids) <= category_event_ids:
+            raise NotFound('События не найдены в категории')
+        kinds = request.args.getlist('kind') or list(GENERATOR_CLASSES)
+        if not set(kinds) <= set(GENERATOR_CLASSES):
+            raise NotFound('Неизвестный тип документа')
+        
+        workers, timeout = get_batch_settings()
+        archive = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        # Пакетный экспорт занимает один слот общего лимита
+        try:
+            with acquire_export_slot():
+                export_events_archive(event_ids, kinds, archive, workers=workers, timeout=timeout)
+        except ExportQueueFull as exc:
+            return _queue_full_response(exc)
+        archive.seek(0)
+        return send_file(archive, as_attachment=True, download_name=f'category-{self.category.id}-export.zip',
+                         mimetype='application/zip')
+
+category_blueprint.add_url_rule('/export/batch', 'export_batch', RHBatchExportDocs)
@@ -0,0 +1,27 @@
+from datetime import date
+from functools import lru_cache
+
+
+# Названия месяцев в форме, нужной после числа (для русского — родительный падеж)
+MONTH_NAMES = {
+    'ru': ('января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+           'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря'),
+    'en': ('January', 'February', 'March', 'April', 'May', 'June',
+           'July', 'August', 'September', 'October', 'November', 'December'),
+}
+
+# Шаблоны даты и даты со временем
+DATE_FORMATS = {
+    'ru': ('{day:02d} {month} {year} г.', '{day:02d} {month} {year} г., {hour:02d}-{minute:02d}'),
+    'en': ('{day:02d} {month} {year}', '{day:02d} {month} {year}, {hour:02d}:{minute:02d}'),
+}
+
+DATE_LANGUAGES = (('ru', 'Русский'), ('en', 'English'))
+
+
+@lru_cache(maxsize=1024)
+def format_date(value: date, include_time: bool = False, language: str = 'ru') -> str:
+    """Форматирование даты без strftime, поэтому результат не зависит от локали процесса"""
+    template = DATE_FORMATS[language][include_time]
+    return template.format(day=value.day, month=MONTH_NAMES[language][value.month - 1], year=value.year,
+                           hour=getattr(value, 'hour', 0), minute=getattr(value, 'minute', 0))
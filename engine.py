@@ -0,0 +1,230 @@
+import hashlib
+import os
+import re
+import struct
+import time
+import zlib
+from collections import namedtuple
+from io import BytesIO
+from typing import BinaryIO, Iterable, List, Optional
+from xml.sax.saxutils import escape
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from docx.shared import Emu
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, StrictUndefined
+from markupsafe import Markup
+
+
+# Каталог шаблонов документов, поставляемых с плагином
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), 'templates', 'exportdocs')
+
+DOCUMENT_PART = 'word/document.xml'
+
+# Шаблон тела документа, в который подставляются отрендеренные разделы
+DOCUMENT_TEMPLATE = 'document.docx.jinja2'
+
+TEMPLATE_SUFFIX = '.docx.jinja2'
+
+_RUN_BREAKS_RE = re.compile(r'([\t\n\r])')
+
+# Символы, недопустимые в XML 1.0: управляющие (кроме табуляции и переводов строк), суррогаты и U+FFFE/U+FFFF
+_INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+# Уровень сжатия тела документа по умолчанию: 0 — без сжатия, 1–9 — уровень deflate
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Уровень сжатия неизменных частей пакета: они сжимаются один раз на процесс
+STATIC_COMPRESSION_LEVEL = 9
+
+# Заголовки записей ZIP: локальный, центрального каталога, дескриптор данных и конец архива
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_DATA_DESCRIPTOR = struct.Struct('<4s3L')
+_END_RECORD = struct.Struct('<4s4H2LH')
+
+# Версия формата ZIP, нужная для распаковки (2.0: deflate)
+_ZIP_VERSION = 20
+
+# Флаг записи: CRC и размеры идут после данных
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+# Запись архива: имя, CRC, способ сжатия, размеры и смещение локального заголовка
+ZipEntry = namedtuple('ZipEntry', ['name', 'crc', 'compress_type', 'compress_size', 'file_size', 'flags',
+                                   'header_offset'])
+
+# Часть пакета, сжатая заранее: запись без смещения и сжатые данные
+PrecompressedPart = namedtuple('PrecompressedPart', ['entry', 'data'])
+
+
+def run_xml(text: str, bold: bool = False) -> str:
+    """XML фрагмента текста (табуляции и переводы строк как в python-docx)
+    
+    Символы, недопустимые в XML, удаляются: иначе Word не откроет документ.
+    """
+    text = _INVALID_XML_RE.sub('', text) if text else text
+    if not text:
+        return '<w:r/>'
+    parts = ['<w:r>']
+    if bold:
+        parts.append('<w:rPr><w:b/></w:rPr>')
+    for chunk in _RUN_BREAKS_RE.split(text):
+        if chunk == '\t':
+            parts.append('<w:tab/>')
+        elif chunk in ('\n', '\r'):
+            parts.append('<w:br/>')
+        elif chunk:
+            parts.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+    parts.append('</w:r>')
+    return ''.join(parts)
+
+
+def precompress_part(name: str, data: bytes, level: int = STATIC_COMPRESSION_LEVEL) -> PrecompressedPart:
+    """Часть пакета, сжатая один раз для копирования в архивы без повторного сжатия"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    entry = ZipEntry(name, zlib.crc32(data), ZIP_DEFLATED, len(compressed), len(data), 0, 0)
+    return PrecompressedPart(entry, compressed)
+
+
+class PackageWriter:
+    """Запись ZIP-архива, в который заранее сжатые части копируются как есть
+    
+    zipfile сжимает каждую запись заново, поэтому архив собирается вручную:
+    неизменные части пишутся готовыми байтами, а сжимается только тело документа.
+    """
+    
+    def __init__(self, fileobj: BinaryIO):
+        self.fileobj = fileobj
+        self.offset = 0
+        self.entries: List[ZipEntry] = []
+        now = time.localtime()
+        self.dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+        self.dos_date = ((now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+    
+    def _write(self, data: bytes) -> None:
+        self.fileobj.write(data)
+        self.offset += len(data)
+    
+    def _local_header(self, entry: ZipEntry) -> bytes:
+        name = entry.name.encode('utf-8')
+        return _LOCAL_HEADER.pack(b'PK\x03\x04', _ZIP_VERSION, entry.flags, entry.compress_type, self.dos_time,
+                                  self.dos_date, entry.crc, entry.compress_size, entry.file_size, len(name), 0) + name
+    
+    def write_precompressed(self, part: PrecompressedPart) -> None:
+        """Копирование заранее сжатой части"""
+        entry = part.entry._replace(header_offset=self.offset)
+        self._write(self._local_header(entry))
+        self._write(part.data)
+        self.entries.append(entry)
+    
+    def write_stream(self, name: str, chunks: Iterable[bytes], level: int = DEFAULT_COMPRESSION_LEVEL) -> None:
+        """Запись части по мере поступления данных; уровень 0 — без сжатия"""
+        compress_type = ZIP_DEFLATED if level else ZIP_STORED
+        seekable = self.fileobj.seekable()
+        # В поток без перемотки CRC и размеры пишутся после данных
+        flags = 0 if seekable else _FLAG_DATA_DESCRIPTOR
+        entry = ZipEntry(name, 0, compress_type, 0, 0, flags, self.offset)
+        header_position = self.fileobj.tell() if seekable else None
+        self._write(self._local_header(entry))
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS) if level else None
+        crc = file_size = compress_size = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data = compressor.compress(chunk) if compressor else chunk
+            if data:
+                compress_size += len(data)
+                self._write(data)
+        if compressor:
+            data = compressor.flush()
+            compress_size += len(data)
+            self._write(data)
+        entry = entry._replace(crc=crc, compress_size=compress_size, file_size=file_size)
+        if seekable:
+            end_position = self.fileobj.tell()
+            self.fileobj.seek(header_position)
+            self.fileobj.write(self._local_header(entry))
+            self.fileobj.seek(end_position)
+        else:
+            self._write(_DATA_DESCRIPTOR.pack(b'PK\x07\x08', crc, compress_size, file_size))
+        self.entries.append(entry)
+    
+    def close(self) -> None:
+        """Запись центрального каталога и конца архива"""
+        directory_offset = self.offset
+        for entry in self.entries:
+            name = entry.name.encode('utf-8')
+            self._write(_CENTRAL_HEADER.pack(b'PK\x01\x02', _ZIP_VERSION, _ZIP_VERSION, entry.flags,
+                                             entry.compress_type, self.dos_time, self.dos_date, entry.crc,
+                                             entry.compress_size, entry.file_size, len(name), 0, 0, 0, 0, 0,
+                                             entry.header_offset) + name)
+        self._write(_END_RECORD.pack(b'PK\x05\x06', 0, 0, len(self.entries), len(self.entries),
+                                     self.offset - directory_offset, directory_offset, 0))
+
+
+class DocxTemplateEngine:
+    """Заполнение подготовленного DOCX-пакета из Jinja-шаблонов тела документа
+    
+    Базовый документ (стили, поля, тема, настройки) сериализуется один раз при
+    создании движка; шаблон описывает только содержимое <w:body>. Для каждого
+    экспорта остается связать данные с шаблоном и записать zip-архив.
+    """
+    
+    def __init__(self, base_document, templates_path: Optional[str] = None):
+        self.directories = [templates_path, TEMPLATES_DIR] if templates_path else [TEMPLATES_DIR]
+        loaders = [FileSystemLoader(directory) for directory in self.directories]
+        # auto_reload перечитывает шаблон только при изменении файла, разбор кэшируется
+        self.env = Environment(loader=ChoiceLoader(loaders), autoescape=True, trim_blocks=True,
+                               lstrip_blocks=True, auto_reload=True, undefined=StrictUndefined)
+        self.env.filters['run'] = lambda text, bold=False: Markup(run_xml(text, bold))
+        self.block_width = base_document._block_width
+        
+        package = BytesIO()
+        base_document.save(package)
+        with ZipFile(package) as zf:
+            parts = [(info.filename, zf.read(info)) for info in zf.infolist()]
+        # Неизменные части сжимаются здесь один раз; None — место тела документа
+        self.parts = [None if name == DOCUMENT_PART else precompress_part(name, data) for name, data in parts]
+        document_xml = dict(parts)[DOCUMENT_PART]
+        body_start = document_xml.index(b'<w:body>') + len(b'<w:body>')
+        body_end = document_xml.index(b'<w:sectPr')
+        self.document_head = document_xml[:body_start]
+        self.document_tail = document_xml[body_end:]
+    
+    def column_widths(self, cols: int) -> List[int]:
+        """Ширины колонок таблицы на всю ширину страницы, в twips (как в python-docx)"""
+        return [Emu(self.block_width // cols).twips] * cols
+    
+    def templates_version(self) -> str:
+        """Отметка версии шаблонов, меняющаяся при правке любого из файлов"""
+        stamps = []
+        for directory in self.directories:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                continue
+            stamps.extend(f'{entry.path}:{entry.stat().st_mtime_ns}' for entry in entries
+                          if entry.name.endswith(TEMPLATE_SUFFIX))
+        return hashlib.sha1('\n'.join(stamps).encode('utf-8')).hexdigest()
+    
+    def render(self, template_name: str, context: dict) -> str:
+        """Рендеринг фрагмента тела документа"""
+        return self.env.get_template(template_name).render(context)
+    
+    def render_to_file(self, template_name: str, context: dict, fileobj: BinaryIO,
+                       compression_level: int = DEFAULT_COMPRESSION_LEVEL) -> None:
+        """Запись документа: неизменные части копируются сжатыми, тело документа сжимается по мере рендеринга"""
+        template = self.env.get_template(template_name)
+        writer = PackageWriter(fileobj)
+        for part in self.parts:
+            if part is not None:
+                writer.write_precompressed(part)
+                continue
+            chunks = (chunk.encode('utf-8') for chunk in template.generate(context))
+            writer.write_stream(DOCUMENT_PART, self._document_chunks(chunks), compression_level)
+        writer.close()
+    
+    def _document_chunks(self, body_chunks: Iterable[bytes]) -> Iterable[bytes]:
+        yield self.document_head
+        yield from body_chunks
+        yield self.document_tail
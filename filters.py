@@ -0,0 +1,177 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from indico.core.db import db
+
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.papers.models.revisions import PaperRevision, PaperRevisionState
+from indico.modules.events.timetable.models.entries import TimetableEntry
+from sqlalchemy import exists, or_
+from werkzeug.datastructures import MultiDict
+
+
+# Статья без ревизий (не подана)
+PAPER_STATE_NONE = 'none'
+
+PAPER_STATES = tuple(PaperRevisionState.__members__) + (PAPER_STATE_NONE,)
+
+# Значение параметра запроса для докладов без сессии, трека или типа
+NO_VALUE = 'none'
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Неверная дата: {value}')
+
+
+def _sorted_ids(ids: Iterable[Optional[int]]) -> List[Optional[int]]:
+    """Идентификаторы без повторов; None (доклады без значения) идет первым"""
+    return sorted(set(ids), key=lambda id_: (id_ is not None, id_ or 0))
+
+
+def _parse_ids(values: Iterable[str]) -> List[Optional[int]]:
+    try:
+        return _sorted_ids(None if value == NO_VALUE else int(value) for value in values if value)
+    except ValueError:
+        raise ValueError('Идентификаторы фильтра должны быть числами')
+
+
+def _list_ids(values: Iterable) -> List[Optional[int]]:
+    """Идентификаторы из настроек списка докладов; вариант «без значения» хранится как None"""
+    ids = []
+    for value in values:
+        if value is None or value == 'None':
+            ids.append(None)
+        elif str(value).isdigit():
+            ids.append(int(value))
+    return _sorted_ids(ids)
+
+
+def _ids_criterion(column, ids: List[Optional[int]]):
+    """Условие на колонку как в списке докладов Indico: None отбирает доклады без значения"""
+    criteria = []
+    if None in ids:
+        criteria.append(column.is_(None))
+    values = [id_ for id_ in ids if id_ is not None]
+    if values:
+        criteria.append(column.in_(values))
+    return or_(*criteria)
+
+
+def _latest_revision_state():
+    """Состояние последней поданной ревизии статьи доклада (коррелированный подзапрос)"""
+    return (db.session.query(PaperRevision.state)
+            .filter(PaperRevision._contribution_id == Contribution.id)
+            .order_by(PaperRevision.submitted_dt.desc(), PaperRevision.id.desc())
+            .limit(1)
+            .scalar_subquery())
+
+
+class ExportFilter:
+    """Отбор докладов для выгрузки; условия добавляются в SQL-запросы загрузки докладов
+    
+    Пустой фильтр выгружает все доклады события и их докладчиков.
+    """
+    
+    def __init__(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 session_ids: Iterable[Optional[int]] = (), track_ids: Iterable[Optional[int]] = (),
+                 type_ids: Iterable[Optional[int]] = (),
+                 paper_state: Optional[str] = None, speakers_only: bool = True):
+        if paper_state is not None and paper_state not in PAPER_STATES:
+            raise ValueError(f'Неизвестное состояние статьи: {paper_state}')
+        self.start_date = start_date
+        self.end_date = end_date
+        self.session_ids = _sorted_ids(session_ids)
+        self.track_ids = _sorted_ids(track_ids)
+        self.type_ids = _sorted_ids(type_ids)
+        self.paper_state = paper_state
+        self.speakers_only = speakers_only
+    
+    @classmethod
+    def from_args(cls, args: MultiDict) -> 'ExportFilter':
+        """Фильтр из параметров запроса; ValueError при неверных значениях"""
+        return cls(start_date=_parse_date(args.get('start_date')),
+                   end_date=_parse_date(args.get('end_date')),
+                   session_ids=_parse_ids(args.getlist('session')),
+                   track_ids=_parse_ids(args.getlist('track')),
+                   type_ids=_parse_ids(args.getlist('type')),
+                   paper_state=args.get('paper_state') or None,
+                   speakers_only=args.get('speakers_only', '1') != '0')
+    
+    def to_args(self) -> MultiDict:
+        """Параметры запроса, по которым фильтр восстанавливается через from_args"""
+        args = MultiDict()
+        if self.start_date:
+            args['start_date'] = self.start_date.isoformat()
+        if self.end_date:
+            args['end_date'] = self.end_date.isoformat()
+        for name, ids in (('session', self.session_ids), ('track', self.track_ids), ('type', self.type_ids)):
+            for id_ in ids:
+                args.add(name, NO_VALUE if id_ is None else str(id_))
+        if self.paper_state:
+            args['paper_state'] = self.paper_state
+        if not self.speakers_only:
+            args['speakers_only'] = '0'
+        return args
+    
+    def key(self) -> str:
+        """Часть ключа кэша; пустая строка для пустого фильтра"""
+        return '&'.join(f'{name}={value}' for name, value in self.to_args().items(multi=True))
+    
+    def _date_range(self) -> tuple:
+        """Границы диапазона дат в UTC; даты разделов документов тоже считаются по UTC"""
+        start_dt = end_dt = None
+        if self.start_date:
+            start_dt = datetime.combine(self.start_date, time.min, tzinfo=timezone.utc)
+        if self.end_date:
+            end_dt = datetime.combine(self.end_date + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        return start_dt, end_dt
+    
+    def contribution_criteria(self) -> list:
+        """Условия WHERE на доклады; запрос должен быть соединен с TimetableEntry"""
+        criteria = []
+        start_dt, end_dt = self._date_range()
+        if start_dt:
+            criteria.append(TimetableEntry.start_dt >= start_dt)
+        if end_dt:
+            criteria.append(TimetableEntry.start_dt < end_dt)
+        if self.session_ids:
+            criteria.append(_ids_criterion(Contribution.session_id, self.session_ids))
+        if self.track_ids:
+            criteria.append(_ids_criterion(Contribution.track_id, self.track_ids))
+        if self.type_ids:
+            criteria.append(_ids_criterion(Contribution.type_id, self.type_ids))
+        if self.paper_state == PAPER_STATE_NONE:
+            criteria.append(~exists().where(PaperRevision._contribution_id == Contribution.id))
+        elif self.paper_state:
+            criteria.append(_latest_revision_state() == PaperRevisionState[self.paper_state])
+        return criteria
+    
+    def person_criteria(self) -> list:
+        """Условия WHERE на связи докладов с людьми"""
+        return [ContributionPersonLink.is_speaker] if self.speakers_only else []
+    
+    @property
+    def needs_timetable(self) -> bool:
+        """Нужно ли соединение с расписанием для условий на доклады"""
+        return bool(self.start_date or self.end_date)
+
+
+def get_contribution_list_filter(event, args: MultiDict) -> ExportFilter:
+    """Фильтр из текущих настроек списка докладов Indico (сессия, трек, тип) и параметров запроса
+    
+    Настройки списка хранятся в сессии пользователя или в статической ссылке (?config=...),
+    поэтому кнопка экспорта передает признак list_filter и параметры страницы списка.
+    """
+    from indico.modules.events.contributions.lists import ContributionListGenerator
+    export_filter = ExportFilter.from_args(args)
+    items = ContributionListGenerator(event).list_config['filters']['items']
+    export_filter.session_ids = export_filter.session_ids or _list_ids(items.get('session') or ())
+    export_filter.track_ids = export_filter.track_ids or _list_ids(items.get('track') or ())
+    export_filter.type_ids = export_filter.type_ids or _list_ids(items.get('type') or ())
+    return export_filter
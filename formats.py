@@ -0,0 +1,233 @@
+import csv
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import namedtuple
+from io import StringIO
+from typing import BinaryIO, Callable, Iterator, Optional
+from xml.sax.saxutils import escape
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from .batch import export_event_documents
+from .filters import ExportFilter
+from .metrics import ExportTimer
+from .util import GENERATOR_CLASSES, SPOOL_MAX_SIZE, DocxGenerator
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+# Строк CSV в одной отдаваемой части ответа
+CSV_CHUNK_ROWS = 500
+
+# Ограничение времени конвертации в PDF, с
+PDF_TIMEOUT = 300
+
+ODT_MIMETYPE = 'application/vnd.oasis.opendocument.text'
+
+ODT_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    f'<manifest:file-entry manifest:full-path="/" manifest:media-type="{ODT_MIMETYPE}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+ODT_CONTENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" office:version="1.2">'
+    '<office:body><office:text>'
+)
+
+ODT_CONTENT_TAIL = '</office:text></office:body></office:document-content>'
+
+
+def _section_header(generator: DocxGenerator) -> tuple:
+    """Заголовки колонок табличных форматов: раздел, дата и поля строки"""
+    return ('Раздел', 'Дата') + generator.COLUMNS
+
+
+def _iter_table_rows(generator: DocxGenerator) -> Iterator[tuple]:
+    """Строки всех разделов с названием и датой раздела; разделы строятся по мере чтения"""
+    for section in generator.iter_sections():
+        for row in section.rows:
+            yield (section.title, section.date or '') + tuple('' if value is None else value for value in row)
+
+
+def iter_csv(generator: DocxGenerator, delimiter: str = ',') -> Iterator[bytes]:
+    """CSV по частям, без построения всего файла в памяти"""
+    buffer = StringIO()
+    # BOM нужен Excel, чтобы распознать UTF-8
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\r\n')
+    writer.writerow(_section_header(generator))
+    for i, row in enumerate(_iter_table_rows(generator), 1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_csv(generator: DocxGenerator, fileobj: BinaryIO, delimiter: str = ',') -> None:
+    """Запись CSV в файл построчно"""
+    with generator.timer.phase('save'):
+        for chunk in iter_csv(generator, delimiter):
+            fileobj.write(chunk)
+
+
+def write_tsv(generator: DocxGenerator, fileobj: BinaryIO) -> None:
+    """Запись TSV в файл построчно"""
+    write_csv(generator, fileobj, delimiter='\t')
+
+
+def write_xlsx(generator: DocxGenerator, fileobj: BinaryIO) -> None:
+    """Запись XLSX; в режиме constant_memory строки сразу сбрасываются во временный файл"""
+    with generator.timer.phase('save'):
+        workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'tmpdir': tempfile.gettempdir()})
+        worksheet = workbook.add_worksheet(generator.TITLE[:31])
+        header = _section_header(generator)
+        worksheet.write_row(0, 0, header, workbook.add_format({'bold': True}))
+        worksheet.freeze_panes(1, 0)
+        for i, row in enumerate(_iter_table_rows(generator), 1):
+            worksheet.write_row(i, 0, row)
+        workbook.close()
+
+
+def _odt_text(text) -> str:
+    """Текст абзаца ODT с переводами строк и табуляциями"""
+    return (escape(str(text))
+            .replace('\t', '<text:tab/>')
+            .replace('\r\n', '<text:line-break/>')
+            .replace('\n', '<text:line-break/>'))
+
+
+def _odt_row(values) -> str:
+    cells = ''.join(f'<table:table-cell office:value-type="string"><text:p>{_odt_text(value)}</text:p>'
+                    f'</table:table-cell>' for value in values)
+    return f'<table:table-row>{cells}</table:table-row>'
+
+
+def write_odt(generator: DocxGenerator, fileobj: BinaryIO) -> None:
+    """Запись ODT без оформления: заголовки разделов и таблицы строк"""
+    with generator.timer.phase('save'), ZipFile(fileobj, 'w', compression=ZIP_DEFLATED) as zf:
+        # mimetype должен быть первым и без сжатия
+        zf.writestr('mimetype', ODT_MIMETYPE, compress_type=ZIP_STORED)
+        zf.writestr('META-INF/manifest.xml', ODT_MANIFEST)
+        with zf.open('content.xml', 'w') as stream:
+            stream.write(ODT_CONTENT_HEAD.encode('utf-8'))
+            stream.write(f'<text:h text:outline-level="1">{_odt_text(generator.TITLE)}</text:h>'
+                         f'<text:p>{_odt_text(generator.snapshot.title)}</text:p>'.encode('utf-8'))
+            has_rows = False
+            for i, section in enumerate(generator.iter_sections(), 1):
+                parts = [f'<text:h text:outline-level="2">{_odt_text(section.title)}</text:h>']
+                if section.date:
+                    parts.append(f'<text:p>{_odt_text(section.date)}</text:p>')
+                if section.rows:
+                    has_rows = True
+                    parts.append(f'<table:table table:name="Раздел{i}">'
+                                 f'<table:table-column table:number-columns-repeated="{len(generator.COLUMNS)}"/>'
+                                 f'<table:table-header-rows>{_odt_row(generator.COLUMNS)}</table:table-header-rows>')
+                    parts.extend(_odt_row('' if value is None else value for value in row) for row in section.rows)
+                    parts.append('</table:table>')
+                stream.write(''.join(parts).encode('utf-8'))
+            if generator.EMPTY_MESSAGE and not has_rows:
+                stream.write(f'<text:p>{_odt_text(generator.EMPTY_MESSAGE)}</text:p>'.encode('utf-8'))
+            stream.write(ODT_CONTENT_TAIL.encode('utf-8'))
+
+
+def write_pdf(generator: DocxGenerator, fileobj: BinaryIO) -> None:
+    """PDF из оформленного DOCX через локальный конвертер (LibreOffice в режиме headless)"""
+    with tempfile.TemporaryDirectory(prefix='exportdocs-pdf-') as directory:
+        docx_path = os.path.join(directory, 'document.docx')
+        with open(docx_path, 'wb') as f:
+            generator.generate_to_file(f)
+        with generator.timer.phase('convert'):
+            # Отдельный профиль, чтобы параллельные конвертации не блокировали друг друга
+            subprocess.run([generator.settings['pdf_converter'], f'-env:UserInstallation=file://{directory}/profile',
+                            '--headless', '--convert-to', 'pdf', '--outdir', directory, docx_path],
+                           check=True, timeout=PDF_TIMEOUT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(os.path.join(directory, 'document.pdf'), 'rb') as f:
+            shutil.copyfileobj(f, fileobj)
+
+
+def write_docx_format(generator: DocxGenerator, fileobj: BinaryIO) -> None:
+    """Запись оформленного DOCX"""
+    generator.generate_to_file(fileobj)
+
+
+# Формат выгрузки: расширение файла, MIME-тип, функция записи, потоковая отдача (для CSV/TSV)
+# и сжатие файлов этого формата в архиве (уже сжатые форматы хранятся как есть)
+ExportFormat = namedtuple('ExportFormat', ['extension', 'mimetype', 'write', 'stream', 'archive_compression'])
+
+EXPORT_FORMATS = {
+    'docx': ExportFormat('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                         write_docx_format, None, ZIP_STORED),
+    'csv': ExportFormat('csv', 'text/csv', write_csv, iter_csv, ZIP_DEFLATED),
+    'tsv': ExportFormat('tsv', 'text/tab-separated-values', write_tsv,
+                        lambda generator: iter_csv(generator, delimiter='\t'), ZIP_DEFLATED),
+    'xlsx': ExportFormat('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                         write_xlsx, None, ZIP_STORED),
+    'odt': ExportFormat('odt', ODT_MIMETYPE, write_odt, None, ZIP_STORED),
+    'pdf': ExportFormat('pdf', 'application/pdf', write_pdf, None, ZIP_STORED),
+}
+
+# Выгрузка всех документов события одним архивом
+ALL_DOCUMENTS = 'all'
+
+ARCHIVE_MIMETYPE = 'application/zip'
+
+
+def get_download_name(kind: str, export_format: str = 'docx') -> str:
+    """Имя скачиваемого файла"""
+    if kind == ALL_DOCUMENTS:
+        return f'{kind}.zip' if export_format == 'docx' else f'{kind}-{export_format}.zip'
+    return f'{kind}.{EXPORT_FORMATS[export_format].extension}'
+
+
+def get_mimetype(kind: str, export_format: str = 'docx') -> str:
+    """MIME-тип скачиваемого файла"""
+    return ARCHIVE_MIMETYPE if kind == ALL_DOCUMENTS else EXPORT_FORMATS[export_format].mimetype
+
+
+def is_format_available(export_format: str, settings: dict) -> bool:
+    """Доступен ли формат: XLSX требует xlsxwriter, PDF — настроенного конвертера"""
+    if export_format == 'xlsx':
+        return xlsxwriter is not None
+    if export_format == 'pdf':
+        return bool(settings['pdf_converter'])
+    return export_format in EXPORT_FORMATS
+
+
+def get_export_generator(kind: str, event_id: int, progress: Optional[Callable[[int, int], None]] = None,
+                         timer: Optional[ExportTimer] = None,
+                         export_filter: Optional[ExportFilter] = None) -> DocxGenerator:
+    """Генератор с загруженными данными события; общий для всех форматов"""
+    return GENERATOR_CLASSES[kind](event_id, progress=progress, timer=timer, export_filter=export_filter)
+
+
+def write_export(kind: str, event_id: int, fileobj: BinaryIO, export_format: str = 'docx',
+                 progress: Optional[Callable[[int, int], None]] = None, timer: Optional[ExportTimer] = None,
+                 export_filter: Optional[ExportFilter] = None) -> None:
+    """Выгрузка данных события в указанном формате с записью в файл"""
+    if kind == ALL_DOCUMENTS:
+        export_event_documents(event_id, fileobj, export_format, progress=progress, timer=timer,
+                               export_filter=export_filter)
+        return
+    generator = get_export_generator(kind, event_id, progress=progress, timer=timer, export_filter=export_filter)
+    EXPORT_FORMATS[export_format].write(generator, fileobj)
+
+
+def generate_export_file(kind: str, event_id: int, export_format: str = 'docx',
+                         timer: Optional[ExportTimer] = None, export_filter: Optional[ExportFilter] = None) -> BinaryIO:
+    """Выгрузка во временный файл, который при большом размере переносится на диск"""
+    fileobj = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    write_export(kind, event_id, fileobj, export_format, timer=timer, export_filter=export_filter)
+    fileobj.seek(0)
+    return fileobj
@@ -0,0 +1,162 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from indico.core.db import db
+from indico.core.logger import Logger
+from sqlalchemy import event
+
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+logger = Logger.get('exportdocs')
+
+# Границы групп событий по числу докладов для меток метрик
+SIZE_BUCKETS = ((100, 'small'), (500, 'medium'), (2000, 'large'))
+
+_current_timer: ContextVar[Optional['ExportTimer']] = ContextVar('exportdocs_timer', default=None)
+_listeners_registered = False
+
+if prometheus_client is not None:
+    EXPORTS_TOTAL = prometheus_client.Counter('exportdocs_exports_total', 'Число экспортов документов',
+                                              ['kind', 'size', 'cached'])
+    PHASE_SECONDS = prometheus_client.Histogram('exportdocs_phase_seconds', 'Длительность фаз экспорта',
+                                                ['kind', 'size', 'phase'])
+    QUERIES = prometheus_client.Histogram('exportdocs_queries', 'Число SQL-запросов на экспорт',
+                                          ['kind', 'size'], buckets=(1, 2, 5, 10, 20, 50, 100, 500))
+    QUEUE_DEPTH = prometheus_client.Gauge('exportdocs_queue_depth', 'Экспорты, ожидающие свободного слота',
+                                          multiprocess_mode='livesum')
+    ADMISSIONS_TOTAL = prometheus_client.Counter('exportdocs_admissions_total',
+                                                 'Допуск экспортов: сразу, после ожидания или отказ', ['result'])
+    QUEUE_WAIT_SECONDS = prometheus_client.Histogram('exportdocs_queue_wait_seconds',
+                                                     'Ожидание слота экспорта', ['result'])
+
+
+def get_size_bucket(contributions: Optional[int]) -> str:
+    """Метка размера события по числу докладов"""
+    if contributions is None:
+        return 'unknown'
+    for limit, label in SIZE_BUCKETS:
+        if contributions < limit:
+            return label
+    return 'huge'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_timer.get() is not None:
+        conn.info.setdefault('exportdocs_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = _current_timer.get()
+    if timer is not None and conn.info.get('exportdocs_query_start'):
+        timer.query_count += 1
+        timer.query_time += time.perf_counter() - conn.info['exportdocs_query_start'].pop()
+
+
+def _register_listeners() -> None:
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_registered = True
+
+
+class ExportTimer:
+    """Замер фаз экспорта, числа и длительности SQL-запросов"""
+    
+    def __init__(self, kind: str = '', event_id: Optional[int] = None):
+        self.kind = kind
+        self.event_id = event_id
+        self.contributions = None
+        self.cached = False
+        self.phases: Dict[str, float] = {}
+        self.query_count = 0
+        self.query_time = 0.0
+        self._start = time.perf_counter()
+    
+    @contextmanager
+    def phase(self, name: str):
+        """Замер фазы; повторные замеры одной фазы суммируются"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+    
+    @contextmanager
+    def track_queries(self):
+        """Подсчет SQL-запросов, выполненных внутри блока"""
+        _register_listeners()
+        token = _current_timer.set(self)
+        try:
+            yield self
+        finally:
+            _current_timer.reset(token)
+    
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self._start
+    
+    @property
+    def size_bucket(self) -> str:
+        return get_size_bucket(self.contributions)
+    
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing"""
+        entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.phases.items()]
+        entries.append(f'db;dur={self.query_time * 1000:.1f};desc="{self.query_count} queries"')
+        entries.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(entries)
+    
+    def report(self) -> None:
+        """Запись структурированной строки лога и метрик Prometheus (если установлен prometheus_client)"""
+        data = {
+            'kind': self.kind,
+            'event_id': self.event_id,
+            'contributions': self.contributions,
+            'size': self.size_bucket,
+            'cached': self.cached,
+            'total_ms': round(self.total * 1000, 1),
+            'queries': self.query_count,
+            'db_ms': round(self.query_time * 1000, 1),
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+        }
+        logger.info('export_timing %s', json.dumps(data, ensure_ascii=False, sort_keys=True))
+        if prometheus_client is None:
+            return
+        labels = {'kind': self.kind, 'size': self.size_bucket}
+        EXPORTS_TOTAL.labels(cached=str(self.cached).lower(), **labels).inc()
+        QUERIES.labels(**labels).observe(self.query_count)
+        for name, seconds in self.phases.items():
+            PHASE_SECONDS.labels(phase=name, **labels).observe(seconds)
+
+
+@contextmanager
+def track_queue_depth():
+    """Учет экспорта, ожидающего свободного слота, в метрике глубины очереди"""
+    if prometheus_client is None:
+        yield
+        return
+    QUEUE_DEPTH.inc()
+    try:
+        yield
+    finally:
+        QUEUE_DEPTH.dec()
+
+
+def report_admission(result: str, wait: float = 0.0) -> None:
+    """Учет решения о допуске экспорта: admitted, queued или rejected"""
+    if result == 'rejected':
+        logger.warning('export_rejected wait_ms=%.1f', wait * 1000)
+    if prometheus_client is None:
+        return
+    ADMISSIONS_TOTAL.labels(result=result).inc()
+    if result != 'admitted':
+        QUEUE_WAIT_SECONDS.labels(result=result).observe(wait)
@@ -0,0 +1,76 @@
+from datetime import date
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+from .records import ContributionRecord, SpeakerRecord
+
+
+SORT_TITLE = 'title'
+SORT_TIME = 'time'
+SORT_SPEAKER = 'speaker'
+
+SORT_ORDERS = [
+    (SORT_TITLE, 'По названию доклада'),
+    (SORT_TIME, 'По времени в расписании'),
+    (SORT_SPEAKER, 'По фамилии докладчика'),
+]
+
+# Пронумерованная строка раздела: номер, доклад и докладчик
+NumberedSpeaker = Tuple[int, ContributionRecord, SpeakerRecord]
+
+
+class SpeakerEntry:
+    """Докладчик доклада с заранее вычисленными ключами сортировки"""
+    
+    __slots__ = ('contribution', 'speaker', 'title_key', 'speaker_key')
+    
+    def __init__(self, contribution: ContributionRecord, speaker: SpeakerRecord):
+        self.contribution = contribution
+        self.speaker = speaker
+        self.title_key = (contribution.title or '').casefold()
+        self.speaker_key = (speaker.last_name.casefold(), speaker.first_name.casefold(), self.title_key)
+
+
+class OrderingIndex:
+    """Докладчики разделов в нужном порядке, общие для всех документов события
+    
+    Ключи сортировки вычисляются один раз при построении индекса, каждый
+    порядок сортируется при первом обращении и дальше берется готовым.
+    Разделы — даты заседаний и None для докладов без времени.
+    """
+    
+    def __init__(self, date_groups: Dict[date, List[ContributionRecord]],
+                 no_time_contributions: List[ContributionRecord]):
+        groups = dict(date_groups)
+        if no_time_contributions:
+            groups[None] = no_time_contributions
+        # Доклады внутри даты уже упорядочены по времени, поэтому это и есть порядок SORT_TIME
+        self._entries = {key: [SpeakerEntry(contribution, speaker)
+                               for contribution in contributions for speaker in contribution.speakers]
+                         for key, contributions in groups.items()}
+        self._orders: Dict[Tuple[str, bool], Dict[Optional[date], List[NumberedSpeaker]]] = {}
+    
+    @staticmethod
+    def _sort(entries: List[SpeakerEntry], order: str) -> List[SpeakerEntry]:
+        if order == SORT_TITLE:
+            return sorted(entries, key=attrgetter('title_key'))
+        if order == SORT_SPEAKER:
+            return sorted(entries, key=attrgetter('speaker_key'))
+        return entries
+    
+    def _build_order(self, order: str, accepted_only: bool) -> Dict[Optional[date], List[NumberedSpeaker]]:
+        result = {}
+        for key, entries in self._entries.items():
+            if accepted_only:
+                entries = [entry for entry in entries if entry.contribution.accepted]
+            result[key] = [(number, entry.contribution, entry.speaker)
+                           for number, entry in enumerate(self._sort(entries, order), 1)]
+        return result
+    
+    def get_speakers(self, key: Optional[date], order: str = SORT_TITLE,
+                     accepted_only: bool = False) -> List[NumberedSpeaker]:
+        """Пронумерованные докладчики раздела в указанном порядке"""
+        orders_key = (order, accepted_only)
+        if orders_key not in self._orders:
+            self._orders[orders_key] = self._build_order(order, accepted_only)
+        return self._orders[orders_key].get(key, [])
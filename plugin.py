@@ -1,13 +1,134 @@
+from indico.core import signals
 from indico.core.plugins import IndicoPlugin
+from indico.web.forms.base import IndicoForm
+from indico.web.forms.widgets import SwitchWidget
+from indico.web.menu import SideMenuItem
+from wtforms.fields import BooleanField, IntegerField, SelectField, StringField, TextAreaField
+from wtforms.validators import NumberRange
+
+from .classifier import MASTER_KEYWORDS, STUDENT_KEYWORDS
+from .dates import DATE_LANGUAGES
+from .ordering import SORT_ORDERS, SORT_TITLE
+
+
+class SettingsForm(IndicoForm):
+    date_language = SelectField('Язык дат в документах', choices=DATE_LANGUAGES)
+    sort_order = SelectField('Порядок докладов в заседании', choices=SORT_ORDERS)
+    cache_max_size = IntegerField('Размер кэша документов, МБ', [NumberRange(min=0)],
+                                  description='Сгенерированные документы хранятся до изменения данных события. '
+                                              '0 — кэш отключен.')
+    warmup_window = IntegerField('Прогрев документов, ч', [NumberRange(min=0)],
+                                 description='Документы событий, которые идут или начнутся в ближайшие N часов, '
+                                             'генерируются в кэш заранее и после изменений. 0 — прогрев отключен.')
+    max_exports = IntegerField('Одновременных выгрузок', [NumberRange(min=0)],
+                               description='Сколько документов может строиться одновременно во всех процессах. '
+                                           '0 — без ограничения.')
+    max_event_exports = IntegerField('Одновременных выгрузок одного события', [NumberRange(min=0)],
+                                     description='0 — без ограничения.')
+    export_queue_timeout = IntegerField('Ожидание в очереди выгрузок, с', [NumberRange(min=0)],
+                                        description='Сколько запрос ждет свободного места или документа, который '
+                                                    'строит другой запрос, прежде чем получить ответ 503 '
+                                                    'с заголовком Retry-After.')
+    batch_workers = IntegerField('Процессов для пакетного экспорта', [NumberRange(min=0)],
+                                 description='0 — по числу ядер процессора.')
+    batch_timeout = IntegerField('Таймаут документа в пакетном экспорте, с', [NumberRange(min=0)],
+                                 description='0 — без ограничения.')
+    student_keywords = TextAreaField('Признаки студента',
+                                     description='Фрагменты affiliation, по одному на строке, '
+                                                 'при которых статус докладчика — «Студент».')
+    master_keywords = TextAreaField('Признаки магистра',
+                                    description='Фрагменты affiliation, по одному на строке, '
+                                                'при которых статус докладчика — «Магистр». '
+                                                'Признаки студента проверяются первыми.')
+    use_templates = BooleanField('Шаблоны документов', widget=SwitchWidget(),
+                                 description='Документы собираются из Jinja-шаблонов поверх подготовленного '
+                                             'базового документа. Если выключено — через python-docx.')
+    docx_compression = IntegerField('Сжатие DOCX', [NumberRange(min=0, max=9)],
+                                    description='Уровень сжатия тела документа: 1 — быстрее, 9 — меньше файл, '
+                                                '0 — без сжатия. Стили и другие неизменные части сжимаются '
+                                                'один раз при запуске.')
+    templates_path = StringField('Каталог своих шаблонов',
+                                 description='Шаблоны *.docx.jinja2 из этого каталога заменяют одноименные '
+                                             'шаблоны плагина. Пусто — только шаблоны плагина.')
+    pdf_converter = StringField('Конвертер в PDF',
+                                description='Путь к LibreOffice (soffice), через который DOCX конвертируется '
+                                            'в PDF. Пусто — выгрузка в PDF недоступна.')
 
 
 class ExportDocsPlugin(IndicoPlugin):
     """Экспорт отчетов и списков в docx"""
     
+    configurable = True
+    settings_form = SettingsForm
+    default_settings = {
+        'date_language': 'ru',
+        'sort_order': SORT_TITLE,
+        'cache_max_size': 256,
+        'warmup_window': 48,
+        'max_exports': 4,
+        'max_event_exports': 2,
+        'export_queue_timeout': 15,
+        'batch_workers': 0,
+        'batch_timeout': 300,
+        'student_keywords': '\n'.join(STUDENT_KEYWORDS),
+        'master_keywords': '\n'.join(MASTER_KEYWORDS),
+        'use_templates': True,
+        'docx_compression': 6,
+        'templates_path': '',
+        'pdf_converter': '',
+    }
+    
+    def init(self):
+        super().init()
+        for signal in (signals.event.contribution_created, signals.event.contribution_updated,
+                       signals.event.contribution_deleted, signals.event.timetable_entry_created,
+                       signals.event.timetable_entry_updated, signals.event.timetable_entry_deleted,
+                       signals.event.updated):
+            self.connect(signal, self._invalidate_exports)
+        self.connect(signals.menu.items, self._extend_event_management_menu, sender='event-management-sidemenu')
+        self.template_hook('event-management-header-right', self._inject_export_button)
+        self.connect(signals.core.import_tasks, self._import_tasks)
+        self.connect(signals.plugin.cli, self._extend_indico_cli)
+    
+    def _extend_event_management_menu(self, sender, event, **kwargs):
+        """Добавляет пункт меню 'Экспорт документов' в боковое меню управления событиями."""
+        return SideMenuItem('exportdocs', 'Экспорт документов',
+                            f'/event/{event.id}/manage/export',
+                            section='reports', weight=10, icon='file-word')
+    
+    def _inject_export_button(self, event, **kwargs):
+        """Добавляет кнопку экспорта в правую часть заголовка управления событиями."""
+        return '''
+    <div class="group">
+        <a href="/event/{}/manage/export/list" data-export-async
+           class="i-button icon-file-word highlight"
+           title="Экспорт списка докладов в DOCX">
+            <span>Печать отчета</span>
+        </a>
+    </div>
+    '''.format(event.id)
+    
+    def _extend_indico_cli(self, sender, **kwargs):
+        """Команда indico exportdocs для пакетного экспорта"""
+        from .cli import cli
+        return cli
+    
+    def _import_tasks(self, sender, **kwargs):
+        """Регистрация задач Celery плагина"""
+        from . import tasks  # noqa: F401
+    
+    def _invalidate_exports(self, sender, **kwargs):
+        """Сброс кэша документов события при изменении докладов или расписания и отложенный прогрев"""
+        from .cache import invalidate_event_exports
+        from .tasks import schedule_event_warmup
+        event = getattr(sender, 'event', sender)
+        invalidate_event_exports(event.id)
+        schedule_event_warmup(event)
+    
     def get_blueprints(self):
         # Ленивый импорт для избежания циклических импортов
-        from .controllers import blueprint
-        return blueprint
+        from .controllers import blueprint, category_blueprint
+        return blueprint, category_blueprint
     
     def get_assets(self):
         """Возвращает JavaScript и CSS файлы для плагина."""
@@ -0,0 +1,69 @@
+from typing import List, Optional, Tuple
+
+from indico.core.cache import make_scoped_cache
+
+from .cache import get_event_fingerprint
+from .util import GENERATOR_CLASSES
+
+
+# Строк раздела на одной странице предпросмотра
+PREVIEW_PAGE_SIZE = 50
+
+# Время жизни данных предпросмотра, с; устаревшие данные отсекаются отпечатком события
+PREVIEW_TTL = 3600
+
+_previews = make_scoped_cache('exportdocs-preview')
+
+
+def _build_preview(event_id: int, kind: str, prefix: str) -> Tuple[dict, List[list]]:
+    """Построение разделов документа и сохранение каждого раздела отдельно"""
+    generator = GENERATOR_CLASSES[kind](event_id)
+    days = []
+    sections_rows = []
+    for index, section in enumerate(generator.iter_sections()):
+        rows = [list(row) for row in section.rows]
+        _previews.set(f'{prefix}-{index}', rows, timeout=PREVIEW_TTL)
+        sections_rows.append(rows)
+        days.append({'index': index, 'title': section.title, 'date': section.date, 'rows': len(rows)})
+    summary = {
+        'title': generator.TITLE,
+        'event_title': generator.snapshot.title,
+        'columns': list(generator.COLUMNS),
+        'days': days,
+        'empty_message': generator.EMPTY_MESSAGE if not any(sections_rows) else None,
+    }
+    _previews.set(f'{prefix}-days', summary, timeout=PREVIEW_TTL)
+    return summary, sections_rows
+
+
+def _get_prefix(event_id: int, kind: str) -> str:
+    return f'{event_id}-{kind}-{get_event_fingerprint(event_id)}'
+
+
+def get_preview_summary(event_id: int, kind: str) -> dict:
+    """Заголовок документа, колонки и список разделов без строк"""
+    prefix = _get_prefix(event_id, kind)
+    summary = _previews.get(f'{prefix}-days')
+    if summary is None:
+        summary, _ = _build_preview(event_id, kind, prefix)
+    return summary
+
+
+def get_preview_page(event_id: int, kind: str, index: int, page: int) -> Optional[dict]:
+    """Страница строк раздела или None, если раздела нет"""
+    prefix = _get_prefix(event_id, kind)
+    rows = _previews.get(f'{prefix}-{index}')
+    if rows is None:
+        _, sections_rows = _build_preview(event_id, kind, prefix)
+        if index >= len(sections_rows):
+            return None
+        rows = sections_rows[index]
+    pages = max(1, -(-len(rows) // PREVIEW_PAGE_SIZE))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * PREVIEW_PAGE_SIZE
+    return {
+        'rows': rows[start:start + PREVIEW_PAGE_SIZE],
+        'page': page,
+        'pages': pages,
+        'total': len(rows),
+    }
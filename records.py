@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from indico.core.db import db
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.models.events import Event
+from indico.modules.events.models.persons import EventPerson
+from indico.modules.events.papers.models.revisions import PaperRevision, PaperRevisionState
+from indico.modules.events.timetable.models.entries import TimetableEntry
+from sqlalchemy import literal
+
+from .filters import ExportFilter
+
+
+class SpeakerRecord:
+    """Докладчик: только поля, которые выводятся в документы"""
+    
+    __slots__ = ('first_name', 'last_name', 'middle_name', 'affiliation')
+    
+    def __init__(self, first_name: str, last_name: str, middle_name: Optional[str] = None,
+                 affiliation: Optional[str] = None):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.middle_name = middle_name
+        self.affiliation = affiliation
+    
+    def key(self) -> tuple:
+        return self.first_name, self.last_name, self.middle_name, self.affiliation
+
+
+class ContributionRecord:
+    """Доклад с докладчиками, без связи с сессией базы данных"""
+    
+    __slots__ = ('id', 'title', 'start_dt', 'accepted', 'speakers')
+    
+    def __init__(self, id: int, title: str, start_dt: Optional[datetime] = None, accepted: bool = False,
+                 speakers: Optional[List[SpeakerRecord]] = None):
+        self.id = id
+        self.title = title
+        self.start_dt = start_dt
+        self.accepted = accepted
+        self.speakers = speakers if speakers is not None else []
+    
+    def key(self) -> tuple:
+        """Данные доклада, от которых зависит содержимое документов"""
+        return self.id, self.title, self.accepted, tuple(speaker.key() for speaker in self.speakers)
+
+
+def load_contribution_records(event_id: int,
+                              export_filter: Optional[ExportFilter] = None) -> Tuple[str, List[ContributionRecord]]:
+    """Название события и его доклады; запросы выбирают только нужные колонки, без объектов ORM
+    
+    Условия фильтра выполняются в базе данных: из нее выходят только отобранные доклады и докладчики.
+    """
+    event_title = db.session.query(Event.title).filter(Event.id == event_id).scalar()
+    criteria = export_filter.contribution_criteria() if export_filter else []
+    accepted = (db.session.query(PaperRevision.id)
+                .filter(PaperRevision._contribution_id == Contribution.id,
+                        PaperRevision.state == PaperRevisionState.accepted)
+                .exists())
+    contribution_rows = (db.session.query(Contribution.id, Contribution.title, TimetableEntry.start_dt, accepted)
+                         .outerjoin(TimetableEntry, TimetableEntry.contribution_id == Contribution.id)
+                         .filter(Contribution.event_id == event_id, ~Contribution.is_deleted, *criteria)
+                         .all())
+    records = {contribution_id: ContributionRecord(contribution_id, title, start_dt, bool(is_accepted))
+               for contribution_id, title, start_dt, is_accepted in contribution_rows}
+
+    # Отчество есть не во всех версиях Indico
+    middle_name = getattr(EventPerson, 'middle_name', literal(None))
+    speaker_query = (db.session.query(ContributionPersonLink.contribution_id, EventPerson.first_name,
+                                      EventPerson.last_name, middle_name, EventPerson.affiliation)
+                     .join(EventPerson, ContributionPersonLink.person_id == EventPerson.id)
+                     .join(Contribution, ContributionPersonLink.contribution_id == Contribution.id))
+    if export_filter is None:
+        person_criteria = [ContributionPersonLink.is_speaker]
+    else:
+        person_criteria = export_filter.person_criteria()
+        if export_filter.needs_timetable:
+            speaker_query = speaker_query.outerjoin(TimetableEntry, TimetableEntry.contribution_id == Contribution.id)
+    speaker_rows = (speaker_query
+                    .filter(Contribution.event_id == event_id, ~Contribution.is_deleted, *criteria, *person_criteria)
+                    .order_by(ContributionPersonLink.id)
+                    .all())
+    for contribution_id, first_name, last_name, middle, affiliation in speaker_rows:
+        records[contribution_id].speakers.append(SpeakerRecord(first_name, last_name, middle, affiliation))
+    return event_title, list(records.values())
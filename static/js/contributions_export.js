@@ -4,6 +4,89 @@
 (function() {
     'use strict';
 
+    const POLL_INTERVAL = 1000;
+    // Сколько раз опрашивать задачу, прежде чем перейти к обычному скачиванию
+    const MAX_POLL_ATTEMPTS = 300;
+
+    function getCsrfToken() {
+        const meta = document.getElementById('csrf-token');
+        return meta ? meta.getAttribute('content') : '';
+    }
+
+    /**
+     * Фоновая генерация документа: ставит задачу в очередь, показывает прогресс
+     * на кнопке и скачивает файл, когда он готов. При ошибке или слишком долгом
+     * ожидании — обычное скачивание.
+     */
+    function startAsyncExport(link) {
+        if (link.dataset.exportRunning) {
+            return;
+        }
+        link.dataset.exportRunning = '1';
+        const label = link.querySelector('.btn-title') || link.querySelector('span') || link;
+        const originalText = label.textContent;
+
+        function finish(url) {
+            delete link.dataset.exportRunning;
+            label.textContent = originalText;
+            window.location.href = url;
+        }
+
+        function poll(statusUrl, attempt = 1) {
+            fetch(statusUrl, {credentials: 'same-origin'})
+                .then(response => response.ok ? response.json() : Promise.reject(response))
+                .then(job => {
+                    if (job.state === 'done') {
+                        finish(job.download_url);
+                    } else if (job.state === 'failed') {
+                        return Promise.reject(job);
+                    } else if (attempt >= MAX_POLL_ATTEMPTS) {
+                        return Promise.reject(job);
+                    } else {
+                        label.textContent = `Генерация… ${job.progress}%`;
+                        setTimeout(() => poll(statusUrl, attempt + 1), POLL_INTERVAL);
+                    }
+                })
+                .catch(() => finish(link.href));
+        }
+
+        label.textContent = 'Генерация…';
+        // Параметры фильтра остаются в строке запроса, путь задачи — /jobs
+        const jobsUrl = new URL(link.href, window.location.href);
+        jobsUrl.pathname += '/jobs';
+        fetch(jobsUrl, {method: 'POST', credentials: 'same-origin', headers: {'X-CSRF-Token': getCsrfToken()}})
+            .then(response => response.ok ? response.json() : Promise.reject(response))
+            .then(job => poll(job.status_url))
+            .catch(() => finish(link.href));
+    }
+
+    function bindAsyncExport(link) {
+        if (link.dataset.exportAsyncBound) {
+            return;
+        }
+        link.dataset.exportAsyncBound = '1';
+        link.addEventListener('click', evt => {
+            evt.preventDefault();
+            startAsyncExport(link);
+        });
+    }
+
+    function bindAsyncExportLinks() {
+        document.querySelectorAll('a[data-export-async]').forEach(bindAsyncExport);
+    }
+
+    /**
+     * Ссылка на экспорт списка с текущим фильтром списка докладов: сервер берет
+     * настройки фильтра из сессии или статической ссылки (параметр config).
+     */
+    function getListExportUrl() {
+        const url = new URL(window.location.href);
+        url.pathname = url.pathname.replace('/contributions', '/export/list');
+        url.hash = '';
+        url.searchParams.set('list_filter', '1');
+        return url.toString();
+    }
+
     function addExportButton() {
         // Проверяем, что мы на странице управления докладами
         if (!window.location.pathname.includes('/manage/contributions')) {
@@ -31,10 +114,11 @@
             if (container && !buttonAdded) {
                 // Создаем кнопку
                 const button = document.createElement('a');
-                button.href = window.location.pathname.replace('/contributions', '/export/list');
+                button.href = getListExportUrl();
                 button.className = 'i-button icon-file-word highlight';
                 button.title = 'Экспорт списка докладов в DOCX';
                 button.innerHTML = '<span>Печать отчета</span>';
+                bindAsyncExport(button);
                 
                 // Добавляем кнопку в начало контейнера
                 container.insertBefore(button, container.firstChild);
@@ -50,10 +134,11 @@
             if (pageHeader) {
                 const actionsDiv = pageHeader.querySelector('.actions') || pageHeader;
                 const button = document.createElement('a');
-                button.href = window.location.pathname.replace('/contributions', '/export/list');
+                button.href = getListExportUrl();
                 button.className = 'i-button icon-file-word highlight';
                 button.title = 'Экспорт списка докладов в DOCX';
                 button.innerHTML = '<span>Печать отчета</span>';
+                bindAsyncExport(button);
                 
                 actionsDiv.appendChild(button);
                 console.log('Кнопка экспорта добавлена в заголовок страницы');
@@ -64,8 +149,10 @@
     // Запускаем после загрузки DOM
     if (document.readyState === 'loading') {
         document.addEventListener('DOMContentLoaded', addExportButton);
+        document.addEventListener('DOMContentLoaded', bindAsyncExportLinks);
     } else {
         addExportButton();
+        bindAsyncExportLinks();
     }
 
     // Также запускаем после AJAX загрузок (для SPA)
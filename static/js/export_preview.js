@@ -0,0 +1,111 @@
+/**
+ * Предпросмотр документа: список разделов загружается сразу, строки раздела —
+ * при первом раскрытии и далее постранично по кнопке «Показать еще».
+ */
+(function() {
+    'use strict';
+
+    function getJSON(url) {
+        return fetch(url, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : Promise.reject(response));
+    }
+
+    function element(tag, className, text) {
+        const el = document.createElement(tag);
+        if (className) {
+            el.className = className;
+        }
+        if (text !== undefined && text !== null) {
+            el.textContent = text;
+        }
+        return el;
+    }
+
+    function renderDay(day, columns) {
+        const details = element('details');
+        const summary = element('summary', null, day.title);
+        if (day.date) {
+            summary.appendChild(element('span', 'date', day.date));
+        }
+        summary.appendChild(element('span', 'count', `строк: ${day.rows}`));
+        details.appendChild(summary);
+        if (!day.rows) {
+            return details;
+        }
+
+        const table = element('table');
+        const headRow = element('tr');
+        columns.forEach(column => headRow.appendChild(element('th', null, column)));
+        table.appendChild(element('thead')).appendChild(headRow);
+        const tbody = table.appendChild(element('tbody'));
+        const more = element('button', 'more', 'Показать еще');
+        more.hidden = true;
+        details.appendChild(table);
+        details.appendChild(more);
+
+        let nextPage = 1;
+        let loading = false;
+
+        function loadPage() {
+            if (loading) {
+                return;
+            }
+            loading = true;
+            more.disabled = true;
+            getJSON(`${day.url}?page=${nextPage}`)
+                .then(page => {
+                    page.rows.forEach(row => {
+                        const tr = element('tr');
+                        row.forEach(value => tr.appendChild(element('td', null, value)));
+                        tbody.appendChild(tr);
+                    });
+                    nextPage = page.page + 1;
+                    more.hidden = page.page >= page.pages;
+                })
+                .catch(() => {
+                    more.hidden = false;
+                })
+                .finally(() => {
+                    loading = false;
+                    more.disabled = false;
+                });
+        }
+
+        details.addEventListener('toggle', () => {
+            if (details.open && nextPage === 1) {
+                loadPage();
+            }
+        });
+        more.addEventListener('click', loadPage);
+        return details;
+    }
+
+    function initPreview() {
+        const container = document.getElementById('export-preview');
+        if (!container) {
+            return;
+        }
+        const daysBox = container.querySelector('.preview-days');
+        getJSON(container.dataset.daysUrl)
+            .then(summary => {
+                container.querySelector('.preview-title').textContent = summary.title;
+                daysBox.textContent = '';
+                summary.days.forEach(day => daysBox.appendChild(renderDay(day, summary.columns)));
+                if (summary.empty_message) {
+                    daysBox.appendChild(element('div', 'empty', summary.empty_message));
+                } else if (!summary.days.length) {
+                    daysBox.appendChild(element('div', 'empty', 'Доклады не найдены.'));
+                }
+            })
+            .catch(() => {
+                daysBox.textContent = '';
+                daysBox.appendChild(element('div', 'empty', 'Не удалось загрузить предпросмотр.'));
+            });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initPreview);
+    } else {
+        initPreview();
+    }
+})();
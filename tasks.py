@@ -0,0 +1,207 @@
+from datetime import timedelta
+from typing import Optional
+from uuid import uuid4
+
+from celery.schedules import crontab
+from indico.core.cache import make_scoped_cache
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.modules.events.models.events import Event
+from indico.util.date_time import now_utc
+from werkzeug.datastructures import MultiDict
+
+from .admission import RETRY_AFTER, ExportQueueFull, acquire_export_slot
+from .cache import get_event_fingerprint, get_export_cache, get_export_key, get_job_storage
+from .filters import ExportFilter
+from .metrics import ExportTimer, logger
+
+
+# Состояние фоновых задач экспорта: ожидание, выполнение, готово, ошибка
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Время хранения состояния задачи, секунды
+JOB_TTL = 24 * 60 * 60
+
+_jobs = make_scoped_cache('exportdocs-jobs')
+
+
+def get_export_job(job_id: str) -> Optional[dict]:
+    """Состояние фоновой задачи экспорта"""
+    return _jobs.get(job_id)
+
+
+def _update_export_job(job_id: str, **data) -> None:
+    job = _jobs.get(job_id) or {}
+    job.update(data)
+    _jobs.set(job_id, job, timeout=JOB_TTL)
+
+
+def start_export_job(event_id: int, kind: str, export_filter: Optional[ExportFilter] = None) -> str:
+    """Постановка генерации документа (или архива всех документов) в очередь Celery"""
+    job_id = uuid4().hex
+    # Фильтр хранится параметрами запроса, из которых он восстанавливается в задаче
+    filter_args = list(export_filter.to_args().items(multi=True)) if export_filter else []
+    _update_export_job(job_id, event_id=event_id, kind=kind, filter=filter_args, state=JOB_PENDING, progress=0,
+                       key=None)
+    run_export_job.delay(job_id)
+    return job_id
+
+
+# Сколько раз задача откладывается, если все слоты выгрузок заняты
+JOB_MAX_RETRIES = 6
+
+
+@celery.task(plugin='exportdocs', bind=True, max_retries=JOB_MAX_RETRIES)
+def run_export_job(self, job_id: str) -> None:
+    """Генерация документа в фоне с сохранением результата в хранилище задач
+    
+    Если свободного слота выгрузки нет, задача не завершается ошибкой, а повторяется
+    позже: иначе страница перешла бы к синхронному скачиванию.
+    """
+    # Генераторы загружаются при первой задаче, а не при старте процесса Celery
+    from .formats import write_export
+    job = get_export_job(job_id)
+    if job is None:
+        # Состояние задачи истекло до ее запуска: результат некому отдавать
+        logger.warning('Задача экспорта %s не найдена', job_id)
+        return
+    event_id, kind = job['event_id'], job['kind']
+    export_filter = ExportFilter.from_args(MultiDict(job.get('filter', [])))
+    _update_export_job(job_id, state=JOB_RUNNING)
+    
+    def _progress(done: int, total: int) -> None:
+        _update_export_job(job_id, progress=int(done * 100 / total))
+    
+    timer = ExportTimer(kind, event_id)
+    
+    def _write(fileobj) -> None:
+        # Фоновые задачи подчиняются тем же лимитам одновременных выгрузок, что и запросы
+        with timer.phase('queue'):
+            slot = acquire_export_slot(event_id)
+        with slot:
+            write_export(kind, event_id, fileobj, progress=_progress, timer=timer, export_filter=export_filter)
+    
+    try:
+        with timer.track_queries():
+            key = get_export_key(event_id, kind, 'docx', get_event_fingerprint(event_id), export_filter.key())
+            _, created = get_job_storage().get_or_set(key, _write)
+            timer.cached = not created
+    except ExportQueueFull:
+        if self.request.retries < JOB_MAX_RETRIES:
+            _update_export_job(job_id, state=JOB_PENDING)
+            raise self.retry(countdown=RETRY_AFTER)
+        _update_export_job(job_id, state=JOB_FAILED)
+        raise
+    except Exception:
+        _update_export_job(job_id, state=JOB_FAILED)
+        raise
+    timer.report()
+    _update_export_job(job_id, state=JOB_DONE, progress=100, key=key)
+
+
+# Задержка прогрева после изменения события, с: серия правок дает одну перегенерацию
+WARMUP_DEBOUNCE = 5 * 60
+
+# Метки запланированных прогревов событий: пока метка есть, новый прогрев не планируется
+_warmups = make_scoped_cache('exportdocs-warmups')
+
+
+def _is_in_warmup_window(event: Event, window_hours: int) -> bool:
+    """Идет ли событие или начнется ли оно в ближайшие window_hours часов"""
+    now = now_utc()
+    return event.end_dt >= now and event.start_dt <= now + timedelta(hours=window_hours)
+
+
+def warm_up_event_exports(event_id: int) -> int:
+    """Генерация недостающих документов события в кэш; возвращает число созданных документов"""
+    from .batch import DOCUMENT_KINDS
+    from .util import GENERATOR_CLASSES, get_export_settings, load_event_snapshot
+    cache = get_export_cache()
+    if not cache.enabled:
+        return 0
+    fingerprint = get_event_fingerprint(event_id)
+    missing = [kind for kind in DOCUMENT_KINDS
+               if cache.get(get_export_key(event_id, kind, 'docx', fingerprint)) is None]
+    if not missing:
+        return 0
+    # Данные события загружаются один раз для всех документов
+    settings = get_export_settings()
+    snapshot = load_event_snapshot(event_id)
+    created_count = 0
+    for kind in missing:
+        timer = ExportTimer(f'{kind}.warmup', event_id)
+        generator = GENERATOR_CLASSES[kind](event_id, snapshot=snapshot, settings=settings, timer=timer)
+        # Если документ тем временем начал строить запрос пользователя, прогрев дождется его результата
+        _, created = cache.get_or_set(get_export_key(event_id, kind, 'docx', fingerprint),
+                                      generator.generate_to_file)
+        if created:
+            timer.report()
+            created_count += 1
+    return created_count
+
+
+def schedule_event_warmup(event: Event) -> None:
+    """Отложенная перегенерация документов после изменения события, если оно скоро начнется или идет
+    
+    Пока прогрев уже запланирован, новые изменения задач не добавляют: отложенный прогрев
+    считает отпечаток при запуске и учтет их. Так массовая правка ставит в очередь одну задачу.
+    """
+    from .plugin import ExportDocsPlugin
+    key = str(event.id)
+    if _warmups.get(key):
+        return
+    window_hours = ExportDocsPlugin.settings.get('warmup_window')
+    if not window_hours or not get_export_cache().enabled or not _is_in_warmup_window(event, window_hours):
+        return
+    token = uuid4().hex
+    # add не перезаписывает метку, если другой процесс успел запланировать прогрев
+    if not _warmups.add(key, token, timeout=WARMUP_DEBOUNCE * 2):
+        return
+    run_event_warmup.apply_async(args=(event.id, token), countdown=WARMUP_DEBOUNCE)
+
+
+@celery.task(plugin='exportdocs')
+def run_event_warmup(event_id: int, token: str) -> None:
+    """Прогрев после изменения события; изменения после снятия метки планируют следующий прогрев"""
+    key = str(event_id)
+    if _warmups.get(key) != token:
+        return
+    _warmups.delete(key)
+    try:
+        created = warm_up_event_exports(event_id)
+    except ExportQueueFull:
+        logger.warning('Прогрев документов события %d пропущен: все слоты выгрузок заняты', event_id)
+        db.session.rollback()
+        return
+    except Exception:
+        logger.exception('Не удалось прогреть документы события %d', event_id)
+        db.session.rollback()
+        return
+    if created:
+        logger.info('Прогрев документов события %d: создано %d', event_id, created)
+
+
+@celery.periodic_task(run_every=crontab(minute='*/30'), plugin='exportdocs')
+def warm_up_upcoming_exports() -> None:
+    """Заблаговременная генерация документов идущих и ближайших событий"""
+    from .plugin import ExportDocsPlugin
+    window_hours = ExportDocsPlugin.settings.get('warmup_window')
+    if not window_hours or not get_export_cache().enabled:
+        return
+    now = now_utc()
+    event_ids = [event_id for event_id, in (db.session.query(Event.id)
+                                            .filter(~Event.is_deleted, Event.end_dt >= now,
+                                                    Event.start_dt <= now + timedelta(hours=window_hours))
+                                            .order_by(Event.start_dt))]
+    for event_id in event_ids:
+        try:
+            created = warm_up_event_exports(event_id)
+        except Exception:
+            logger.exception('Не удалось прогреть документы события %d', event_id)
+            db.session.rollback()
+            continue
+        if created:
+            logger.info('Прогрев документов события %d: создано %d', event_id, created)
@@ -0,0 +1,51 @@
+import json
+import os
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('indico')
+
+from ..benchmarks.fakes import SETTINGS, make_event, make_snapshot
+from ..benchmarks.generators import SCALES, compare
+from ..util import GENERATOR_CLASSES
+
+
+# Масштабы для прогона в тестах; большие события замеряются модулем benchmarks.generators
+TEST_SCALES = tuple((count, days) for count, days in SCALES if count <= 1000)
+
+# Базовые замеры; обновляются на машине, где запускаются тесты:
+#   python -m indico_exportdocs.benchmarks.generators --max-count 1000 --repeat 10 --save tests/benchmark_baseline.json
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+# Допустимое замедление относительно базовых замеров (доля): с запасом на шум виртуальных машин;
+# на выделенной машине порог можно ужесточить переменной окружения
+TOLERANCE = float(os.environ.get('EXPORTDOCS_BENCHMARK_TOLERANCE', 1.0))
+
+# Случаи быстрее этого, с, не сравниваются с базовыми: их время определяется шумом планировщика
+MIN_COMPARED_SECONDS = 0.005
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize(('count', 'days'), TEST_SCALES)
+@pytest.mark.parametrize('kind', tuple(GENERATOR_CLASSES))
+def test_generator(benchmark, baseline, kind, count, days):
+    # Событие и снимок строятся один раз, генератор и файл — до каждого замера: замеряется только запись
+    snapshot = make_snapshot(make_event(count, days))
+    generator_cls = GENERATOR_CLASSES[kind]
+    
+    def setup():
+        return (generator_cls(0, snapshot=snapshot, settings=SETTINGS), BytesIO()), {}
+    
+    benchmark.pedantic(lambda generator, output: generator.generate_to_file(output), setup=setup, rounds=20)
+    name = f'{kind}-{count}x{days}'
+    if benchmark.disabled or baseline[name]['seconds'] < MIN_COMPARED_SECONDS:
+        return
+    regressions = compare({name: {'seconds': benchmark.stats.stats.min}}, baseline, TOLERANCE)
+    assert not regressions, regressions
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('indico')
+
+from ..admission import ExportQueueFull
+from ..cache import EVICT_CHECK_INTERVAL, ExportCache
+
+
+# Одновременных запросов одного документа
+REQUESTS = 8
+
+
+def _run_concurrently(cache: ExportCache, write) -> list:
+    """get_or_set одного ключа из REQUESTS потоков, стартующих одновременно"""
+    barrier = threading.Barrier(REQUESTS)
+    results = []
+    
+    def _request():
+        barrier.wait()
+        try:
+            results.append(cache.get_or_set('0-report-docx-test', write))
+        except ExportQueueFull as exc:
+            results.append(exc)
+    
+    threads = [threading.Thread(target=_request) for _ in range(REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_requests_build_once(tmp_path):
+    cache = ExportCache(str(tmp_path), 1024 * 1024)
+    builds = []
+    
+    def _write(fileobj):
+        builds.append(threading.get_ident())
+        time.sleep(0.2)
+        fileobj.write(b'document')
+    
+    results = _run_concurrently(cache, _write)
+    assert len(builds) == 1
+    assert sorted(created for _, created in results) == [False] * (REQUESTS - 1) + [True]
+    assert len({path for path, _ in results}) == 1
+    with open(results[0][0], 'rb') as f:
+        assert f.read() == b'document'
+
+
+def test_waiters_give_up_after_timeout(tmp_path):
+    cache = ExportCache(str(tmp_path), 1024 * 1024, wait_timeout=0.2)
+    builds = []
+    
+    def _write(fileobj):
+        builds.append(threading.get_ident())
+        time.sleep(1)
+        fileobj.write(b'document')
+    
+    results = _run_concurrently(cache, _write)
+    assert len(builds) == 1
+    assert sum(1 for result in results if isinstance(result, ExportQueueFull)) == REQUESTS - 1
+    assert all(exc.retry_after for exc in results if isinstance(exc, ExportQueueFull))
+
+
+def test_eviction_scans_only_when_needed(tmp_path, monkeypatch):
+    cache = ExportCache(str(tmp_path), 100 * 10)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, '_evict', lambda: scans.append(1) or evict())
+    
+    for index in range(EVICT_CHECK_INTERVAL // 2):
+        cache.set('small-{}'.format(index), b'')
+    assert len(scans) == 1
+    
+    for index in range(20):
+        cache.set('large-{}'.format(index), b'x' * 100)
+    assert sum(entry.stat().st_size for entry in tmp_path.iterdir() if entry.name.endswith('.cache')) <= 100 * 10
@@ -0,0 +1,51 @@
+import locale
+from datetime import date, datetime
+
+import pytest
+
+from ..dates import format_date
+
+
+# Локали с другими названиями месяцев и порядком полей; отсутствующие в системе пропускаются
+LOCALES = ('C', 'C.UTF-8', 'en_US.UTF-8', 'de_DE.UTF-8', 'ru_RU.UTF-8')
+
+
+@pytest.fixture(params=LOCALES)
+def time_locale(request):
+    """Локаль LC_TIME процесса на время теста"""
+    saved = locale.setlocale(locale.LC_TIME)
+    try:
+        locale.setlocale(locale.LC_TIME, request.param)
+    except locale.Error:
+        pytest.skip(f'Локаль {request.param} недоступна')
+    yield request.param
+    locale.setlocale(locale.LC_TIME, saved)
+
+
+@pytest.mark.parametrize(('value', 'include_time', 'language', 'expected'), (
+    (date(2026, 3, 5), False, 'ru', '05 марта 2026 г.'),
+    (date(2026, 12, 31), False, 'ru', '31 декабря 2026 г.'),
+    (datetime(2026, 5, 1, 9, 7), True, 'ru', '01 мая 2026 г., 09-07'),
+    (date(2026, 3, 5), False, 'en', '05 March 2026'),
+    (datetime(2026, 5, 1, 9, 7), True, 'en', '01 May 2026, 09:07'),
+    (datetime(2026, 5, 1, 23, 59), False, 'en', '01 May 2026'),
+))
+def test_format_date(value, include_time, language, expected):
+    assert format_date(value, include_time, language) == expected
+
+
+def test_format_date_default_language():
+    assert format_date(date(2026, 1, 15)) == '15 января 2026 г.'
+
+
+@pytest.mark.parametrize('language', ('ru', 'en'))
+def test_format_date_ignores_locale(time_locale, language):
+    value = datetime(2026, 2, 14, 18, 30)
+    format_date.cache_clear()
+    expected = {'ru': '14 февраля 2026 г., 18-30', 'en': '14 February 2026, 18:30'}[language]
+    assert format_date(value, True, language) == expected
+
+
+def test_format_date_unknown_language():
+    with pytest.raises(KeyError):
+        format_date(date(2026, 1, 1), language='de')
@@ -0,0 +1,15 @@
+import pytest
+
+pytest.importorskip('indico')
+
+from ..benchmarks.importtime import LAZY_MODULES, measure
+
+
+# Имя, под которым плагин установлен в окружение Indico
+PACKAGE = 'indico_exportdocs'
+
+
+def test_boot_does_not_load_export_modules():
+    # Время импорта зависит от машины, поэтому проверяется только состав загруженных модулей
+    _, _, eager = measure(PACKAGE)
+    assert not eager, f'загружены при старте: {", ".join(eager)} (должны загружаться лениво: {LAZY_MODULES})'
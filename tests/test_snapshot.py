@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('indico.testing')
+
+from indico.modules.events.contributions.models.contributions import Contribution
+from indico.modules.events.contributions.models.persons import ContributionPersonLink
+from indico.modules.events.models.persons import EventPerson
+
+from ..filters import ExportFilter
+from ..metrics import ExportTimer
+from ..util import load_event_snapshot
+
+
+# Запросы загрузки снимка: название события, доклады, докладчики
+SNAPSHOT_QUERIES = 3
+
+
+def _create_contributions(db, event, count: int) -> None:
+    for i in range(count):
+        contribution = Contribution(event=event, title=f'Доклад {i}', duration=timedelta(minutes=20))
+        person = EventPerson(event=event, first_name=f'Имя {i}', last_name=f'Фамилия {i}',
+                             email=f'speaker{i}@example.com')
+        contribution.person_links.append(ContributionPersonLink(person=person, is_speaker=True))
+        db.session.add(contribution)
+    # Вставки выполняются до замера, чтобы autoflush не попал в число запросов
+    db.session.flush()
+
+
+@pytest.mark.parametrize('count', (0, 1, 10, 200))
+def test_snapshot_query_count(db, dummy_event, count):
+    _create_contributions(db, dummy_event, count)
+    timer = ExportTimer()
+    with timer.track_queries():
+        snapshot = load_event_snapshot(dummy_event.id)
+    assert snapshot.contribution_count == count
+    assert timer.query_count == SNAPSHOT_QUERIES
+
+
+@pytest.mark.parametrize('export_filter', (
+    ExportFilter(speakers_only=False),
+    ExportFilter(start_date=date(2000, 1, 1), end_date=date(2100, 1, 1)),
+    ExportFilter(session_ids=[None], paper_state='accepted'),
+))
+def test_filtered_snapshot_query_count(db, dummy_event, export_filter):
+    _create_contributions(db, dummy_event, 50)
+    timer = ExportTimer()
+    with timer.track_queries():
+        load_event_snapshot(dummy_event.id, export_filter)
+    assert timer.query_count == SNAPSHOT_QUERIES
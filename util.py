@@ -1,15 +1,98 @@
 from docx import Document
-from indico.modules.events.models.events import Event
-from indico.modules.events.papers.models.revisions import PaperRevisionState
 from io import BytesIO
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Inches, Pt
 from docx.enum.table import WD_ALIGN_VERTICAL
 from docx.shared import RGBColor
-from collections import defaultdict
-from typing import List, Dict, Optional, Tuple
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.part import XmlPart
+from docx.opc.pkgwriter import _ContentTypesItem
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from lxml import etree
+from markupsafe import Markup
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+import copy
+import hashlib
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterator, List, Dict, Optional, Tuple
 from datetime import date, datetime
 
+from .cache import ExportCache, get_section_cache
+from .classifier import get_affiliation_classifier
+from .dates import format_date
+from .engine import DOCUMENT_TEMPLATE, DocxTemplateEngine, run_xml
+from .filters import ExportFilter
+from .metrics import ExportTimer
+from .ordering import NumberedSpeaker, OrderingIndex
+from .records import ContributionRecord, SpeakerRecord, load_contribution_records
+
+
+# Строки разделов документов
+ListRow = namedtuple('ListRow', ['number', 'speaker', 'title', 'status'])
+ReportRow = namedtuple('ReportRow', ['number', 'speaker', 'title'])
+PublicationRow = namedtuple('PublicationRow', ['number', 'author', 'affiliation', 'title'])
+
+# Заседание до построения строк: заголовок, дата (или None), доклады, пустой абзац после раздела
+# и ключ раздела в индексе порядка (дата или None для докладов без времени)
+SectionGroup = namedtuple('SectionGroup', ['title', 'date', 'contributions', 'spacer', 'key'])
+
+# Раздел документа: заголовок, дата (или None), строки и пустой абзац после раздела
+Section = namedtuple('Section', ['title', 'date', 'rows', 'spacer'])
+
+
+class EventSnapshot:
+    """Снимок данных события для генерации документов"""
+    
+    def __init__(self, event_id: int, title: str, contributions: List[ContributionRecord]):
+        self.event_id = event_id
+        self.title = title
+        self.contribution_count = len(contributions)
+        self.date_groups, self.no_time_contributions = self._group_by_date(contributions)
+        self._ordering = None
+    
+    @property
+    def ordering(self) -> OrderingIndex:
+        """Индекс порядка докладчиков, общий для всех документов по этому снимку"""
+        if self._ordering is None:
+            self._ordering = OrderingIndex(self.date_groups, self.no_time_contributions)
+        return self._ordering
+    
+    @staticmethod
+    def _group_by_date(contributions: List) -> Tuple[Dict[date, List], List]:
+        """Группировка докладов по дате и отдельно без времени"""
+        date_groups = defaultdict(list)
+        no_time_contributions = []
+        for contrib in contributions:
+            if contrib.start_dt:
+                date_groups[contrib.start_dt.date()].append(contrib)
+            else:
+                no_time_contributions.append(contrib)
+        
+        # Сортировка докладов внутри каждой даты
+        for date_key in date_groups:
+            date_groups[date_key].sort(key=lambda x: x.start_dt)
+        
+        return dict(sorted(date_groups.items())), no_time_contributions
+
+
+def load_event_snapshot(event_id: int, export_filter: Optional[ExportFilter] = None) -> EventSnapshot:
+    """Загрузка докладов события с докладчиками и статьями фиксированным числом запросов"""
+    # Записи не связаны с сессией; транзакцией управляет вызывающий код
+    title, contributions = load_contribution_records(event_id, export_filter)
+    return EventSnapshot(event_id, title, contributions)
+
+
+def get_export_settings() -> dict:
+    """Настройки плагина, влияющие на содержимое документов"""
+    from .plugin import ExportDocsPlugin
+    return ExportDocsPlugin.settings.get_all()
+
+
+# Подготовленные базовые документы: класс генератора и оформление -> документ с полями и стилями
+_base_documents: Dict[tuple, Document] = {}
+
 
 class DocxGenerator:
     """Базовый класс для генерации DOCX документов"""
@@ -30,105 +113,163 @@ class DocxGenerator:
     
     LINE_SPACING = 1.5
     
-    # Перевод месяцев
-    MONTH_TRANSLATIONS = {
-        'January': 'января', 'February': 'февраля', 'March': 'марта', 'April': 'апреля',
-        'May': 'мая', 'June': 'июня', 'July': 'июля', 'August': 'августа',
-        'September': 'сентября', 'October': 'октября', 'November': 'ноября', 'December': 'декабря'
-    }
+    # Число строк таблицы, разбираемых из XML за один раз
+    TABLE_ROWS_BATCH = 500
     
-    def __init__(self, event_id: int):
-        self.event = Event.get(event_id)
-        self.doc = Document()
-        self._setup_document()
-    
-    def _setup_document(self) -> None:
-        """Настройка базовых параметров документа"""
-        for section in self.doc.sections:
-            section.left_margin = self.MARGINS['left']
-            section.right_margin = self.MARGINS['right']
-            section.top_margin = self.MARGINS['top']
-            section.bottom_margin = self.MARGINS['bottom']
-    
-    def _set_black_color(self, element) -> None:
-        """Установка черного цвета для всех элементов"""
-        if hasattr(element, 'runs'):
-            for run in element.runs:
-                run.font.color.rgb = self.FONT_SETTINGS['color']
-        if hasattr(element, 'paragraphs'):
-            for paragraph in element.paragraphs:
-                self._set_black_color(paragraph)
-        if hasattr(element, 'tables'):
-            for table in element.tables:
-                self._set_black_color(table)
-    
-    def _format_russian_date(self, date_obj: date, include_time: bool = False) -> str:
-        """Форматирование даты на русском языке"""
-        if include_time:
-            date_str = date_obj.strftime('%d %B %Y г., %H-%M')
-        else:
-            date_str = date_obj.strftime('%d %B %Y г.')
-        
-        for eng, rus in self.MONTH_TRANSLATIONS.items():
-            date_str = date_str.replace(eng, rus)
-        
-        return date_str
+    # Стили, в которых задается оформление по ГОСТ
+    STYLE_NAMES = ('Normal', 'Title', 'Heading 1', 'Table Grid')
+    
+    # Заголовок документа и шаблон для рендеринга без python-docx
+    TITLE = ''
+    TEMPLATE_NAME = ''
+    
+    # Заголовки полей строки раздела для табличных форматов (CSV, XLSX, ODT)
+    COLUMNS = ()
+    
+    # Оформление разделов по дням
+    SECTION_TITLE_SUFFIX = ''
+    SECTION_DATE_WITH_TIME = False
+    
+    # Текст, если в документе не оказалось ни одной строки
+    EMPTY_MESSAGE = None
+    
+    # Только доклады с принятой статьей
+    ACCEPTED_ONLY = False
+    
+    def __init__(self, event_id: int, snapshot: Optional[EventSnapshot] = None,
+                 progress: Optional[Callable[[int, int], None]] = None, settings: Optional[dict] = None,
+                 timer: Optional[ExportTimer] = None, section_cache: Optional[ExportCache] = None,
+                 export_filter: Optional[ExportFilter] = None):
+        self.timer = timer or ExportTimer()
+        # Настройки читаются до снимка, после которого сессия базы данных уже не нужна
+        self.settings = settings or get_export_settings()
+        with self.timer.phase('load'):
+            self.snapshot = snapshot or load_event_snapshot(event_id, export_filter)
+        self.timer.contributions = self.snapshot.contribution_count
+        self.progress = progress
+        self.classifier = get_affiliation_classifier(self.settings)
+        if section_cache is None and self.settings['cache_max_size']:
+            section_cache = get_section_cache(self.settings['cache_max_size'])
+        self.section_cache = section_cache
+        self.doc = None
+    
+    @classmethod
+    def create_document(cls) -> Document:
+        """Новый документ с полями и стилями по ГОСТ"""
+        doc = Document()
+        for section in doc.sections:
+            section.left_margin = cls.MARGINS['left']
+            section.right_margin = cls.MARGINS['right']
+            section.top_margin = cls.MARGINS['top']
+            section.bottom_margin = cls.MARGINS['bottom']
+        cls._setup_styles(doc)
+        return doc
+    
+    @classmethod
+    def get_base_document(cls) -> Document:
+        """Копия базового документа, подготовленного один раз на процесс
+        
+        Базовый документ пересоздается, если изменилось оформление (поля, шрифт, стили).
+        Генератор меняет только основную часть документа, поэтому копируется только она,
+        а стили, тема, настройки и остальные части общие для всех копий и только читаются.
+        """
+        key = (cls, repr((cls.MARGINS, cls.FONT_SETTINGS, cls.LINE_SPACING, cls.STYLE_NAMES)))
+        base = _base_documents.get(key)
+        if base is None:
+            base = _base_documents[key] = cls.create_document()
+        main_part = base.part
+        memo = {id(part): part for part in main_part.package.parts if part is not main_part}
+        return copy.deepcopy(base, memo)
+    
+    @classmethod
+    def _setup_styles(cls, doc: Document) -> None:
+        """Настройка стилей документа, от которых оформление наследуют все абзацы и таблицы"""
+        for style_name in cls.STYLE_NAMES:
+            style = doc.styles[style_name]
+            # Шрифты темы имеют приоритет над явно заданным шрифтом, поэтому убираем их
+            rfonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+            for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme'):
+                rfonts.attrib.pop(qn(attr), None)
+            style.font.name = cls.FONT_SETTINGS['name']
+            style.font.size = cls.FONT_SETTINGS['size']
+            style.font.color.rgb = cls.FONT_SETTINGS['color']
+            style.paragraph_format.line_spacing = cls.LINE_SPACING
+    
+    def _report_progress(self, done: int, total: int) -> None:
+        """Сообщение о ходе генерации (для фоновых задач)"""
+        if self.progress:
+            self.progress(done, total)
+    
+    def _format_date(self, date_obj: date, include_time: bool = False) -> str:
+        """Форматирование даты на языке из настроек"""
+        return format_date(date_obj, include_time, self.settings['date_language'])
     
     def _get_contributions_by_date(self) -> Tuple[Dict[date, List], List]:
         """Группировка докладов по дате и отдельно без времени"""
-        contributions_with_time = [c for c in self.event.contributions 
-                                 if not c.is_deleted and c.start_dt]
-        contributions_without_time = [c for c in self.event.contributions 
-                                    if not c.is_deleted and not c.start_dt]
-        
-        date_groups = defaultdict(list)
-        for contrib in contributions_with_time:
-            date_key = contrib.start_dt.date()
-            date_groups[date_key].append(contrib)
-        
-        # Сортировка докладов внутри каждой даты
-        for date_key in date_groups:
-            date_groups[date_key].sort(key=lambda x: x.start_dt)
-        
-        return dict(sorted(date_groups.items())), contributions_without_time
+        return self.snapshot.date_groups, self.snapshot.no_time_contributions
     
-    def _get_speaker_name(self, person) -> str:
+    def _get_speaker_name(self, person: SpeakerRecord) -> str:
         """Форматирование имени докладчика"""
         middle_initial = f".{person.first_name[1]}" if len(person.first_name) > 1 else ""
         return f"{person.last_name} {person.first_name[0]}{middle_initial}"
     
-    def _get_full_name(self, person) -> str:
+    def _get_full_name(self, person: SpeakerRecord) -> str:
         """Полное имя с отчеством если есть"""
-        if hasattr(person, 'middle_name') and person.middle_name:
+        if person.middle_name:
             return f"{person.last_name} {person.first_name} {person.middle_name}"
         return f"{person.first_name} {person.last_name}"
     
-    def _determine_student_status(self, person) -> str:
+    def _determine_student_status(self, person: SpeakerRecord) -> str:
         """Определение статуса участника"""
-        if not person.affiliation:
-            return 'Не указан'
-        
-        affiliation_lower = person.affiliation.lower()
-        
-        student_keywords = ['студент', 'student', 'бакалавр', 'bachelor', '1 курс', '2 курс', '3 курс', '4 курс']
-        master_keywords = ['магистр', 'master', 'магистрант', '5 курс', '6 курс']
-        
-        for keyword in student_keywords:
-            if keyword in affiliation_lower:
-                return 'Студент'
+        return self.classifier.classify(person.affiliation)
+    
+    def _get_speakers(self, group: SectionGroup) -> List[NumberedSpeaker]:
+        """Пронумерованные докладчики раздела в порядке из настроек"""
+        return self.snapshot.ordering.get_speakers(group.key, self.settings['sort_order'], self.ACCEPTED_ONLY)
+    
+    def _get_rows(self, speakers: List[NumberedSpeaker]) -> List[tuple]:
+        """Строки раздела документа"""
+        raise NotImplementedError
+    
+    def _get_section_groups(self) -> List[SectionGroup]:
+        """Заседания по дням и доклады без времени"""
+        date_groups, no_time_contribs = self._get_contributions_by_date()
+        sorted_dates = sorted(date_groups.keys())
+        groups = []
         
-        for keyword in master_keywords:
-            if keyword in affiliation_lower:
-                return 'Магистр'
+        for i, date_key in enumerate(sorted_dates, 1):
+            meeting_title = f'Заседание {i}' if len(sorted_dates) > 1 else 'Заседание'
+            groups.append(SectionGroup(meeting_title + self.SECTION_TITLE_SUFFIX,
+                                       self._format_date(date_key, include_time=self.SECTION_DATE_WITH_TIME),
+                                       date_groups[date_key],
+                                       spacer=True, key=date_key))
         
-        return person.affiliation
+        if no_time_contribs:
+            groups.append(SectionGroup('Доклады без указанного времени', None, no_time_contribs,
+                                       spacer=False, key=None))
+        return groups
+    
+    def _get_section(self, group: SectionGroup) -> Section:
+        """Раздел документа со строками"""
+        return Section(group.title, group.date, self._get_rows(self._get_speakers(group)), group.spacer)
+    
+    def iter_sections(self) -> Iterator[Section]:
+        """Разделы документа по одному: заседания по дням и доклады без времени"""
+        groups = self._get_section_groups()
+        for i, group in enumerate(groups, 1):
+            yield self._get_section(group)
+            self._report_progress(i, len(groups))
+    
+    def _get_empty_message(self, has_rows: bool) -> Optional[str]:
+        """Текст в конце документа, если ни в одном разделе нет строк"""
+        if self.EMPTY_MESSAGE and not has_rows:
+            return self.EMPTY_MESSAGE
+        return None
     
     def _add_heading(self, text: str, level: int = 0, alignment: int = WD_ALIGN_PARAGRAPH.CENTER) -> None:
         """Добавление заголовка"""
         heading = self.doc.add_heading(text, level)
         heading.alignment = alignment
-        for run in heading.runs:
-            run.font.color.rgb = self.FONT_SETTINGS['color']
     
     def _add_centered_paragraph(self, text: str, bold: bool = False) -> None:
         """Добавление центрированного параграфа"""
@@ -136,296 +277,264 @@ class DocxGenerator:
         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
         if bold and paragraph.runs:
             paragraph.runs[0].font.bold = True
-            paragraph.runs[0].font.color.rgb = self.FONT_SETTINGS['color']
-    
-    def _apply_document_styling(self) -> None:
-        """Применение стилей ко всему документу"""
-        for paragraph in self.doc.paragraphs:
-            for run in paragraph.runs:
-                run.font.name = self.FONT_SETTINGS['name']
-                run.font.size = self.FONT_SETTINGS['size']
-                run.font.color.rgb = self.FONT_SETTINGS['color']
-            paragraph.paragraph_format.line_spacing = self.LINE_SPACING
-        
-        for table in self.doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.font.name = self.FONT_SETTINGS['name']
-                            run.font.size = self.FONT_SETTINGS['size']
-                            run.font.color.rgb = self.FONT_SETTINGS['color']
-                        paragraph.paragraph_format.line_spacing = self.LINE_SPACING
+    
+    def _append_table_rows(self, table, rows: List[Tuple[str, ...]], alignments: Tuple[str, ...]) -> None:
+        """Добавление строк таблицы одним фрагментом XML по заранее собранному шаблону строки"""
+        if not rows:
+            return
+        tbl = table._tbl
+        widths = [grid_col.w for grid_col in tbl.tblGrid.gridCol_lst]
+        cell_templates = [
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width.twips}"/><w:vAlign w:val="center"/></w:tcPr>'
+            f'<w:p><w:pPr><w:jc w:val="{alignment}"/></w:pPr>{{}}</w:p></w:tc>'
+            for width, alignment in zip(widths, alignments)
+        ]
+        row_template = '<w:tr>' + ''.join(cell_templates) + '</w:tr>'
+        # Разбор пачками, чтобы строка XML не росла вместе с числом докладов
+        for start in range(0, len(rows), self.TABLE_ROWS_BATCH):
+            batch = rows[start:start + self.TABLE_ROWS_BATCH]
+            rows_xml = ''.join(row_template.format(*map(run_xml, row)) for row in batch)
+            fragment = parse_xml(f'<w:tbl {nsdecls("w")}>{rows_xml}</w:tbl>')
+            tbl.extend(list(fragment))
+    
+    def _build(self) -> None:
+        """Построение содержимого документа через python-docx"""
+        self._add_heading(self.TITLE, 0)
+        self._add_centered_paragraph(f'"{self.snapshot.title}"', bold=True)
+        self.doc.add_paragraph()
         
-        self._set_black_color(self.doc)
+        sections = list(self.iter_sections())
+        for section in sections:
+            self._add_heading(section.title, level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
+            if section.date:
+                date_para = self.doc.add_paragraph(section.date)
+                date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            self._add_rows(section.rows)
+            if section.spacer:
+                self.doc.add_paragraph()
+        
+        empty_message = self._get_empty_message(any(section.rows for section in sections))
+        if empty_message:
+            self.doc.add_paragraph().add_run(empty_message)
+    
+    def _add_rows(self, rows: List[tuple]) -> None:
+        """Добавление строк раздела в документ python-docx"""
+        raise NotImplementedError
+    
+    def _get_section_context(self, engine: DocxTemplateEngine) -> dict:
+        """Общие данные для шаблона раздела"""
+        return {}
+    
+    def _get_section_key(self, group: SectionGroup, templates_version: str) -> str:
+        """Ключ раздела в кэше: шаблоны, настройки оформления и данные докладов заседания"""
+        contributions = [contribution.key() for contribution in group.contributions]
+        data = (self.TEMPLATE_NAME, templates_version, self.settings['student_keywords'],
+                self.settings['master_keywords'], self.settings['sort_order'], group.title, group.date, group.spacer, contributions)
+        return 'section:' + hashlib.sha1(repr(data).encode('utf-8')).hexdigest()
     
-    def _save_to_bytes(self) -> bytes:
-        """Сохранение документа в bytes"""
+    def _read_cached_section(self, key: str) -> Optional[Tuple[int, str]]:
+        """Число строк и XML раздела из кэша"""
+        path = self.section_cache.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                row_count, xml = f.read().decode('utf-8').split('\n', 1)
+        except FileNotFoundError:
+            # Файл вытеснен другим процессом между проверкой и чтением
+            return None
+        return int(row_count), xml
+    
+    def _render_sections(self, engine: DocxTemplateEngine) -> Iterator[Tuple[int, str]]:
+        """Число строк и XML разделов; разделы с неизменными докладами берутся из кэша"""
+        context = self._get_section_context(engine)
+        templates_version = engine.templates_version() if self.section_cache else None
+        groups = self._get_section_groups()
+        for i, group in enumerate(groups, 1):
+            key = self._get_section_key(group, templates_version) if self.section_cache else None
+            cached = self._read_cached_section(key) if key else None
+            if cached:
+                yield cached
+            else:
+                section = self._get_section(group)
+                xml = engine.render(self.TEMPLATE_NAME, dict(context, section=section))
+                if key:
+                    self.section_cache.set(key, f'{len(section.rows)}\n{xml}'.encode('utf-8'))
+                yield len(section.rows), xml
+            self._report_progress(i, len(groups))
+    
+    def _get_template_context(self, engine: DocxTemplateEngine) -> dict:
+        """Данные для шаблона документа; разделы рендерятся по мере записи документа"""
+        row_counts = []
+        
+        def render_sections():
+            for row_count, xml in self._render_sections(engine):
+                row_counts.append(row_count)
+                yield Markup(xml)
+        
+        return {
+            'title': self.TITLE,
+            'event_title': self.snapshot.title,
+            'sections': render_sections(),
+            'empty_message': lambda: self._get_empty_message(any(row_counts)),
+        }
+    
+    def generate(self) -> bytes:
+        """Генерация документа в bytes"""
         f = BytesIO()
-        self.doc.save(f)
+        self.generate_to_file(f)
         return f.getvalue()
+    
+    def generate_to_file(self, fileobj: BinaryIO) -> None:
+        """Генерация документа с записью в файл без промежуточной копии в памяти"""
+        if self.settings['use_templates']:
+            engine = get_template_engine(self.settings['templates_path'])
+            # Разделы строятся лениво во время записи, поэтому фаза build входит в save
+            with self.timer.phase('save'):
+                engine.render_to_file(DOCUMENT_TEMPLATE, self._get_template_context(engine), fileobj,
+                                      self.settings['docx_compression'])
+            return
+        self._build_document()
+        with self.timer.phase('save'):
+            self._write_package(fileobj)
+    
+    def _build_document(self) -> None:
+        """Построение документа python-docx (без шаблонов)"""
+        with self.timer.phase('setup'):
+            self.doc = self.get_base_document()
+        with self.timer.phase('build'):
+            self._build()
+    
+    def _write_package(self, fileobj: BinaryIO) -> None:
+        """Запись пакета DOCX в zip-поток; XML частей сериализуется сразу в архив, без копии в bytes"""
+        package = self.doc.part.package
+        parts = package.parts
+        for part in parts:
+            part.before_marshal()
+        level = self.settings['docx_compression']
+        with ZipFile(fileobj, 'w', compression=ZIP_DEFLATED if level else ZIP_STORED, compresslevel=level or None) as zf:
+            zf.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+            zf.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+            for part in parts:
+                if isinstance(part, XmlPart):
+                    with zf.open(part.partname.membername, 'w') as stream:
+                        etree.ElementTree(part.element).write(stream, encoding='UTF-8', standalone=True)
+                else:
+                    zf.writestr(part.partname.membername, part.blob)
+                if len(part.rels):
+                    zf.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+@lru_cache(maxsize=4)
+def get_template_engine(templates_path: str = '') -> DocxTemplateEngine:
+    """Движок шаблонов с базовым документом, подготовленным один раз на процесс"""
+    return DocxTemplateEngine(DocxGenerator.create_document(), templates_path or None)
 
 
 class ContributionsListGenerator(DocxGenerator):
     """Генератор списка докладов"""
     
-    def generate(self) -> bytes:
-        """Генерация документа со списком докладов"""
-        self._add_heading('СПИСОК ДОКЛАДОВ', 0)
-        self._add_centered_paragraph(f'"{self.event.title}"', bold=True)
-        self.doc.add_paragraph()
-        
-        date_groups, no_time_contribs = self._get_contributions_by_date()
-        
-        # Доклады с временем
-        if date_groups:
-            self._add_date_grouped_contributions(date_groups)
-        
-        # Доклады без времени
-        if no_time_contribs:
-            self._add_no_time_contributions(no_time_contribs)
-        
-        self._apply_document_styling()
-        return self._save_to_bytes()
+    TITLE = 'СПИСОК ДОКЛАДОВ'
+    TEMPLATE_NAME = 'list.docx.jinja2'
+    COLUMNS = ('№', 'Докладчик', 'Название доклада', 'Статус')
     
-    def _add_date_grouped_contributions(self, date_groups: Dict[date, List]) -> None:
-        """Добавление докладов сгруппированных по дате"""
-        sorted_dates = sorted(date_groups.keys())
-        
-        for i, date_key in enumerate(sorted_dates, 1):
-            date_contributions = date_groups[date_key]
-            date_str = self._format_russian_date(date_key)
-            
-            meeting_title = f'Заседание {i}' if len(sorted_dates) > 1 else 'Заседание'
-            self._add_heading(meeting_title, level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-            
-            date_para = self.doc.add_paragraph(date_str)
-            date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            
-            self._create_contributions_table(date_contributions)
-            self.doc.add_paragraph()
-    
-    def _add_no_time_contributions(self, contributions: List) -> None:
-        """Добавление докладов без указанного времени"""
-        self._add_heading('Доклады без указанного времени', level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-        self._create_contributions_table(contributions)
-    
-    def _create_contributions_table(self, contributions: List) -> None:
+    TABLE_HEADERS = ('№', 'Фамилия и инициалы докладчика, название доклада',
+                     'Статус (магистр / студент)', 'Решение')
+    
+    # Выравнивание колонок: №, ФИО и название, статус, решение
+    TABLE_ALIGNMENTS = ('center', 'left', 'center', 'center')
+    
+    def _get_rows(self, speakers: List[NumberedSpeaker]) -> List[ListRow]:
+        """Строки таблицы: каждый докладчик отдельной строкой"""
+        return [ListRow(number, self._get_speaker_name(speaker), contribution.title or 'Без названия',
+                        self._determine_student_status(speaker))
+                for number, contribution, speaker in speakers]
+    
+    def _add_rows(self, rows: List[ListRow]) -> None:
         """Создание таблицы с докладами"""
         table = self.doc.add_table(rows=1, cols=4)
         table.style = 'Table Grid'
         
-        # Заголовки таблицы
-        headers = ['№', 'Фамилия и инициалы докладчика, название доклада', 
-                  'Статус (магистр / студент)', 'Решение']
-        
         hdr_cells = table.rows[0].cells
-        for i, header in enumerate(headers):
+        for i, header in enumerate(self.TABLE_HEADERS):
             hdr_cells[i].text = header
             hdr_cells[i].paragraphs[0].runs[0].font.bold = True
             hdr_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
             hdr_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
         
-        # Заполнение таблицы
-        row_number = 1
-        for contribution in sorted(contributions, key=lambda x: x.title.lower() if x.title else ''):
-            speakers = [link.person for link in contribution.person_links if link.is_speaker]
-            
-            if not speakers:
-                continue
-                
-            for speaker in speakers:
-                row = table.add_row().cells
-                
-                # Номер
-                row[0].text = str(row_number)
-                row[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                row[0].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                
-                # Докладчик и название
-                speaker_name = self._get_speaker_name(speaker)
-                contribution_title = contribution.title or 'Без названия'
-                row[1].text = f"{speaker_name}. {contribution_title}"
-                row[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-                row[1].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                
-                # Статус
-                status = self._determine_student_status(speaker)
-                row[2].text = status
-                row[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                row[2].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                
-                # Решение (пустое)
-                row[3].text = ''
-                row[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                row[3].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                
-                row_number += 1
+        self._append_table_rows(table, [(str(row.number), f'{row.speaker}. {row.title}', row.status, '')
+                                        for row in rows],
+                                self.TABLE_ALIGNMENTS)
+    
+    def _get_section_context(self, engine: DocxTemplateEngine) -> dict:
+        return {'headers': self.TABLE_HEADERS, 'column_widths': engine.column_widths(len(self.TABLE_HEADERS))}
 
 
 class ConferenceReportGenerator(DocxGenerator):
     """Генератор отчета о конференции"""
     
-    def generate(self) -> bytes:
-        """Генерация отчета о конференции"""
-        self._add_heading('ОТЧЕТ О ПРОВЕДЕНИИ КОНФЕРЕНЦИИ', 0)
-        self._add_centered_paragraph(f'"{self.event.title}"', bold=True)
-        self.doc.add_paragraph()
-        
-        date_groups, no_time_contribs = self._get_contributions_by_date()
-        
-        # Доклады с временем
-        if date_groups:
-            self._add_date_grouped_contributions(date_groups)
-        
-        # Доклады без времени
-        if no_time_contribs:
-            self._add_no_time_contributions(no_time_contribs)
-        
-        self._apply_document_styling()
-        return self._save_to_bytes()
+    TITLE = 'ОТЧЕТ О ПРОВЕДЕНИИ КОНФЕРЕНЦИИ'
+    TEMPLATE_NAME = 'report.docx.jinja2'
+    COLUMNS = ('№', 'Докладчик', 'Название доклада')
+    SECTION_DATE_WITH_TIME = True
     
-    def _add_date_grouped_contributions(self, date_groups: Dict[date, List]) -> None:
-        """Добавление докладов сгруппированных по дате"""
-        sorted_dates = sorted(date_groups.keys())
-        
-        for i, date_key in enumerate(sorted_dates, 1):
-            date_contributions = date_groups[date_key]
-            date_str = self._format_russian_date(date_key, include_time=True)
-            
-            meeting_title = f'Заседание {i}' if len(sorted_dates) > 1 else 'Заседание'
-            self._add_heading(meeting_title, level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-            
-            date_para = self.doc.add_paragraph(date_str)
-            date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            
-            self._add_contributions_list(date_contributions)
-            self.doc.add_paragraph()
-    
-    def _add_no_time_contributions(self, contributions: List) -> None:
-        """Добавление докладов без указанного времени"""
-        self._add_heading('Доклады без указанного времени', level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-        self._add_contributions_list(contributions)
-    
-    def _add_contributions_list(self, contributions: List) -> None:
+    def _get_rows(self, speakers: List[NumberedSpeaker]) -> List[ReportRow]:
+        """Пронумерованные докладчики с названиями докладов"""
+        return [ReportRow(number, self._get_speaker_name(speaker), contribution.title or 'Без названия')
+                for number, contribution, speaker in speakers]
+    
+    def _add_rows(self, rows: List[ReportRow]) -> None:
         """Добавление списка докладов в виде параграфов"""
-        row_number = 1
-        for contribution in sorted(contributions, key=lambda x: x.title.lower() if x.title else ''):
-            speakers = [link.person for link in contribution.person_links if link.is_speaker]
-            
-            if not speakers:
-                continue
-                
-            for speaker in speakers:
-                p = self.doc.add_paragraph()
-                
-                run_number = p.add_run(f"{row_number}. ")
-                run_number.bold = True
-                
-                speaker_name = self._get_speaker_name(speaker)
-                run_name = p.add_run(speaker_name)
-                run_name.bold = True
-                
-                contribution_title = contribution.title or 'Без названия'
-                p.add_run(f". {contribution_title}")
-                
-                row_number += 1
+        for row in rows:
+            p = self.doc.add_paragraph()
+            p.add_run(f"{row.number}. ").bold = True
+            p.add_run(row.speaker).bold = True
+            p.add_run(f". {row.title}")
 
 
 class PublicationsListGenerator(DocxGenerator):
     """Генератор списка публикаций"""
     
-    def generate(self) -> bytes:
-        """Генерация списка публикаций"""
-        self._add_heading('СПИСОК ПУБЛИКАЦИЙ', 0)
-        self._add_centered_paragraph(f'"{self.event.title}"', bold=True)
-        self.doc.add_paragraph()
-        
-        date_groups, no_time_contribs = self._get_contributions_by_date()
-        has_publications = False
-        
-        # Публикации с временем
-        if date_groups:
-            has_publications = self._add_date_grouped_publications(date_groups) or has_publications
-        
-        # Публикации без времени
-        if no_time_contribs:
-            has_publications = self._add_no_time_publications(no_time_contribs) or has_publications
-        
-        if not has_publications:
-            p = self.doc.add_paragraph()
-            p.add_run("Статьи, принятые к публикации, не найдены.")
-            p.italic = True
-        
-        self._apply_document_styling()
-        return self._save_to_bytes()
-    
-    def _add_date_grouped_publications(self, date_groups: Dict[date, List]) -> bool:
-        """Добавление публикаций сгруппированных по дате"""
-        sorted_dates = sorted(date_groups.keys())
-        has_publications = False
-        
-        for i, date_key in enumerate(sorted_dates, 1):
-            date_contributions = date_groups[date_key]
-            date_str = self._format_russian_date(date_key)
-            
-            meeting_title = f'Заседание {i}.' if len(sorted_dates) > 1 else 'Заседание.'
-            self._add_heading(meeting_title, level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-            
-            date_para = self.doc.add_paragraph(date_str)
-            date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            
-            has_date_publications = self._add_publications_list(date_contributions)
-            has_publications = has_publications or has_date_publications
-            self.doc.add_paragraph()
-        
-        return has_publications
+    TITLE = 'СПИСОК ПУБЛИКАЦИЙ'
+    TEMPLATE_NAME = 'papers.docx.jinja2'
+    COLUMNS = ('№', 'Автор', 'Организация', 'Название статьи')
+    SECTION_TITLE_SUFFIX = '.'
+    EMPTY_MESSAGE = 'Статьи, принятые к публикации, не найдены.'
+    ACCEPTED_ONLY = True
     
-    def _add_no_time_publications(self, contributions: List) -> bool:
-        """Добавление публикаций без указанного времени"""
-        self._add_heading('Доклады без указанного времени', level=1, alignment=WD_ALIGN_PARAGRAPH.LEFT)
-        return self._add_publications_list(contributions)
+    def _get_rows(self, speakers: List[NumberedSpeaker]) -> List[PublicationRow]:
+        """Авторы докладов с принятыми статьями"""
+        return [PublicationRow(number, self._get_full_name(author), author.affiliation,
+                               contribution.title or 'Без названия')
+                for number, contribution, author in speakers]
     
-    def _add_publications_list(self, contributions: List) -> bool:
+    def _add_rows(self, rows: List[PublicationRow]) -> None:
         """Добавление списка публикаций"""
-        row_number = 1
-        has_publications = False
-        
-        for contribution in sorted(contributions, key=lambda x: x.title.lower() if x.title else ''):
-            # Проверяем, есть ли принятая статья
-            if (hasattr(contribution, '_accepted_paper_revision') and 
-                contribution._accepted_paper_revision and
-                hasattr(contribution._accepted_paper_revision, 'state') and
-                contribution._accepted_paper_revision.state == PaperRevisionState.accepted):
-                
-                authors = [link.person for link in contribution.person_links if link.is_speaker]
-                
-                if not authors:
-                    continue
-                
-                for author in authors:
-                    p = self.doc.add_paragraph()
-                    
-                    run_number = p.add_run(f"    {row_number}. ")
-                    run_number.bold = True
-                    
-                    full_name = self._get_full_name(author)
-                    run_name = p.add_run(full_name)
-                    run_name.bold = True
-                    
-                    # Добавляем affiliation
-                    if author.affiliation:
-                        p.add_run(f", {author.affiliation}")
-                    
-                    p.add_run("\n")
-                    
-                    article_title = contribution.title or 'Без названия'
-                    p.add_run(article_title)
-                    
-                    row_number += 1
-                    has_publications = True
-        
-        return has_publications
+        for row in rows:
+            p = self.doc.add_paragraph()
+            p.add_run(f"    {row.number}. ").bold = True
+            p.add_run(row.author).bold = True
+            if row.affiliation:
+                p.add_run(f", {row.affiliation}")
+            p.add_run("\n")
+            p.add_run(row.title)
+
+
+# Размер документа, после которого временный файл переносится из памяти на диск
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Генераторы по типу экспорта
+GENERATOR_CLASSES = {
+    'list': ContributionsListGenerator,
+    'report': ConferenceReportGenerator,
+    'papers': PublicationsListGenerator,
+}
+
+
+def generate_docx(kind: str, event_id: int, progress: Optional[Callable[[int, int], None]] = None) -> bytes:
+    """Генерация документа указанного типа"""
+    generator = GENERATOR_CLASSES[kind](event_id, progress=progress)
+    return generator.generate()
 
 
 # Функции-обертки для обратной совместимости